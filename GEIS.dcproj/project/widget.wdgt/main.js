@@ -5,6 +5,11 @@
  */
 
 
+// Local wallpaper service (serve.py); set to null to read the file directly
+var geisService = 'http://127.0.0.1:8766';
+var geisVersion = null;
+var geisEvents = null;
+
 //
 // Function: updateGEISPhoto()
 // Called by load and show to update photo
@@ -12,9 +17,30 @@
 //
 function updateGEISPhoto()
 {
-    var image = new Image();
-    image.src = '/Users/dnewell/dev/geis-wallpaper/wallpaper.png?' + new Date().getTime();
-    document.getElementById("geisWallpaper").src = image.src;
+    // Without the service (or before its first frame) read the file written by set_wallpaper
+    if (!geisService || !geisVersion) {
+        var image = new Image();
+        image.src = '/Users/dnewell/dev/geis-wallpaper/wallpaper.png?' + new Date().getTime();
+        document.getElementById("geisWallpaper").src = image.src;
+    } else {
+        // Version in the URL changes only with a new frame; the ETag revalidates otherwise
+        document.getElementById("geisWallpaper").src = geisService + '/wallpaper.half.jpeg?v=' + geisVersion;
+    }
+    // Subscribe to new frame notifications (retried on the next update if the service is down)
+    if (geisService && !geisEvents && window.EventSource) {
+        geisEvents = new EventSource(geisService + '/events');
+        geisEvents.addEventListener('frame', function (e) {
+            geisVersion = e.lastEventId;
+            updateGEISPhoto();
+        });
+        geisEvents.onerror = function () {
+            this.close();
+            if (geisEvents === this) {
+                geisEvents = null;
+                geisVersion = null;
+            }
+        };
+    }
 }
 
 //
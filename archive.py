@@ -0,0 +1,278 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Rolling archive of rendered frames stored as keyframes plus tile deltas
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, io, json, zlib, struct, time, logging
+import numpy as np
+from PIL import Image
+
+
+# Frame record header: timestamp, kind, payload length
+HEADER = struct.Struct('<dBI')
+# Tile record header: tile column, tile row, compressed length
+TILE = struct.Struct('<HHI')
+KEYFRAME = 0
+DELTA = 1
+
+
+class Archive(object):
+    """ Archive of frames grouped into segments, each a keyframe followed by tile deltas
+
+    :param path: Archive directory
+    :type path: str
+    :param keyframe_interval: Frames per segment (bounds decode cost of random access)
+    :type keyframe_interval: int
+    :param tile: Tile size in pixels for deltas
+    :type tile: int
+    :param max_age: Seconds frames are retained
+    :type max_age: float
+    :param downsample: List of [age, spacing] - frames older than age are thinned to one per spacing seconds
+    :type downsample: list
+    :param prune_interval: Seconds between automatic prunes run from add (0 disables)
+    :type prune_interval: float
+    """
+    def __init__(self, path='archive', keyframe_interval=24, tile=64, max_age=7*86400, downsample=[[86400, 3600]], prune_interval=3600):
+        """ Open or create archive """
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.tile = tile
+        self.max_age = max_age
+        self.downsample = sorted(downsample, reverse=True)
+        self.prune_interval = prune_interval
+        self._last_prune = None
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._index_file = os.path.join(path, 'index.json')
+        # Index entries: [timestamp, segment name, offset, kind]
+        self._index = []
+        if os.path.exists(self._index_file):
+            with open(self._index_file) as f:
+                self._index = json.load(f)
+        self._last = None
+
+    # ----------------------------------------------------
+    #  Encoding
+    # ----------------------------------------------------
+
+    def _tiles(self, frame):
+        """ View frame as (rows, cols, tile, tile, channels), padding edges to whole tiles """
+        t = self.tile
+        h, w = frame.shape[:2]
+        ph, pw = -h % t, -w % t
+        if ph or pw:
+            frame = np.pad(frame, ((0, ph), (0, pw), (0, 0)), mode='edge')
+        rows, cols = frame.shape[0]//t, frame.shape[1]//t
+        return frame.reshape(rows, t, cols, t, -1).swapaxes(1, 2)
+
+    def _encode_keyframe(self, frame):
+        """ PNG compressed keyframe """
+        buf = io.BytesIO()
+        Image.fromarray(frame).save(buf, 'PNG', optimize=False)
+        return buf.getvalue()
+
+    def _encode_delta(self, previous, frame):
+        """ Compressed tiles that differ from the previous frame """
+        prev, cur = self._tiles(previous), self._tiles(frame)
+        changed = np.argwhere((prev != cur).any(axis=(2, 3, 4)))
+        parts = [struct.pack('<HHI', frame.shape[0], frame.shape[1], len(changed))]
+        for row, col in changed:
+            data = zlib.compress(np.ascontiguousarray(cur[row, col]).tobytes(), 6)
+            parts.append(TILE.pack(col, row, len(data)))
+            parts.append(data)
+        return b''.join(parts)
+
+    def _decode(self, kind, payload, previous):
+        """ Decode a frame record given the previous frame """
+        if kind == KEYFRAME:
+            return np.array(Image.open(io.BytesIO(payload)).convert('RGB'))
+        h, w, count = struct.unpack_from('<HHI', payload)
+        frame = previous.copy()
+        tiles = self._tiles(frame)
+        pos = struct.calcsize('<HHI')
+        for i in range(count):
+            col, row, length = TILE.unpack_from(payload, pos)
+            pos += TILE.size
+            tiles[row, col] = np.frombuffer(zlib.decompress(payload[pos:pos+length]), dtype=np.uint8).reshape(tiles.shape[2:])
+            pos += length
+        # Tiles may be a padded copy; crop back to frame size
+        t = self.tile
+        return np.ascontiguousarray(tiles.swapaxes(1, 2).reshape(tiles.shape[0]*t, tiles.shape[1]*t, -1)[:h, :w])
+
+    # ----------------------------------------------------
+    #  Writing
+    # ----------------------------------------------------
+
+    def _segment_path(self, name):
+        """ Segment file path """
+        return os.path.join(self.path, name + '.seg')
+
+    def _write(self, name, ts, kind, payload):
+        """ Append record to segment and index """
+        with open(self._segment_path(name), 'ab') as f:
+            offset = f.tell()
+            f.write(HEADER.pack(ts, kind, len(payload)))
+            f.write(payload)
+        self._index.append([ts, name, offset, kind])
+
+    def _save_index(self):
+        """ Persist index atomically """
+        tmp = self._index_file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._index, f)
+        os.rename(tmp, self._index_file)
+
+    def add(self, image, ts=None):
+        """ Add a frame
+
+        :param image: Rendered frame
+        :type image: PIL.Image
+        :param ts: Frame time (epoch seconds), default now
+        :type ts: float
+        """
+        ts = time.time() if ts is None else ts
+        frame = np.asarray(image.convert('RGB'))
+        # Apply retention policies at most once per prune interval
+        if self.prune_interval and (self._last_prune is None or ts - self._last_prune >= self.prune_interval):
+            self.prune(ts)
+        # Rebuild last frame after restart
+        if self._last is None and self._index:
+            self._last = self.frame_at(self._index[-1][0])
+        segment = self._index[-1][1] if self._index else None
+        frames_in_segment = sum(1 for e in self._index if e[1] == segment)
+        if self._last is None or self._last.shape != frame.shape or frames_in_segment >= self.keyframe_interval:
+            self._write('{:.0f}'.format(ts*1000), ts, KEYFRAME, self._encode_keyframe(frame))
+        else:
+            self._write(segment, ts, DELTA, self._encode_delta(self._last, frame))
+        self._last = frame
+        self._save_index()
+
+    # ----------------------------------------------------
+    #  Reading
+    # ----------------------------------------------------
+
+    def timestamps(self):
+        """ Archived frame timestamps """
+        return [e[0] for e in self._index]
+
+    def _read_segment(self, name, until=None):
+        """ Yield (timestamp, frame) for a segment in order, stopping after timestamp until """
+        previous = None
+        with open(self._segment_path(name), 'rb') as f:
+            while True:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return
+                ts, kind, length = HEADER.unpack(header)
+                previous = self._decode(kind, f.read(length), previous)
+                yield ts, previous
+                if until is not None and ts >= until:
+                    return
+
+    def frame_at(self, ts):
+        """ Frame archived at or before ts, decoding at most one segment prefix (None if none)
+
+        :param ts: Time (epoch seconds)
+        :type ts: float
+        """
+        entries = [e for e in self._index if e[0] <= ts]
+        if not entries:
+            return None
+        entry = entries[-1]
+        frame = None
+        for frame_ts, frame in self._read_segment(entry[1], until=entry[0]):
+            pass
+        return frame
+
+    def image_at(self, ts):
+        """ Frame archived at or before ts as an image """
+        frame = self.frame_at(ts)
+        return None if frame is None else Image.fromarray(frame)
+
+    def export(self, start, end):
+        """ Stream (timestamp, image) for frames between start and end, one segment at a time
+
+        :param start: Range start (epoch seconds)
+        :type start: float
+        :param end: Range end (epoch seconds)
+        :type end: float
+        """
+        segments = []
+        for e in self._index:
+            if e[0] <= end and e[1] not in segments:
+                segments.append(e[1])
+        for name in segments:
+            entries = [e[0] for e in self._index if e[1] == name]
+            if entries[-1] < start:
+                continue
+            for ts, frame in self._read_segment(name, until=end):
+                if start <= ts <= end:
+                    yield ts, Image.fromarray(frame)
+
+    # ----------------------------------------------------
+    #  Retention
+    # ----------------------------------------------------
+
+    def _keep(self, timestamps, now):
+        """ Select timestamps kept by retention and downsampling policies """
+        kept = []
+        last = None
+        for ts in timestamps:
+            age = now - ts
+            if age > self.max_age:
+                continue
+            spacing = 0
+            for after, every in self.downsample:
+                if age > after:
+                    spacing = every
+                    break
+            if last is None or ts - last >= spacing:
+                kept.append(ts)
+                last = ts
+        return set(kept)
+
+    def prune(self, now=None):
+        """ Apply retention and downsampling, rewriting affected segments
+
+        :param now: Current time (epoch seconds)
+        :type now: float
+        """
+        now = time.time() if now is None else now
+        self._last_prune = now
+        keep = self._keep(self.timestamps(), now)
+        original = self._index
+        segments = []
+        for e in original:
+            if e[1] not in segments:
+                segments.append(e[1])
+        index = []
+        for name in segments:
+            entries = [e for e in original if e[1] == name]
+            if all(e[0] in keep for e in entries):
+                index.extend(entries)
+                continue
+            # Re-encode kept frames of this segment as a new segment
+            kept = [(ts, frame) for ts, frame in self._read_segment(name) if ts in keep]
+            os.remove(self._segment_path(name))
+            if not kept:
+                continue
+            self._index = []
+            previous = None
+            newName = '{:.0f}'.format(kept[0][0]*1000)
+            for ts, frame in kept:
+                if previous is None:
+                    self._write(newName, ts, KEYFRAME, self._encode_keyframe(frame))
+                else:
+                    self._write(newName, ts, DELTA, self._encode_delta(previous, frame))
+                previous = frame
+            index.extend(self._index)
+        self._index = index
+        self._save_index()
+        # Last segment may have been rewritten
+        self._last = None
+        logging.info('Archive pruned to {} frames'.format(len(index)))
@@ -0,0 +1,74 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Store of decoded images memory-mapped from raw uint8 arrays
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, glob, hashlib, logging
+import numpy as np
+from PIL import Image
+import metrics
+
+
+# Version of the stored array layout, part of every cache key
+LAYOUT = 2
+
+
+class AssetStore(object):
+    """ Decodes each source image once, resampled to its target size, and memory-maps it afterwards
+
+    :param path: Cache directory
+    :type path: str
+    """
+    def __init__(self, path='cache/assets'):
+        """ Create asset store """
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _name(self, source, size):
+        """ Cache file prefix for a source path and target size """
+        key = '{}|{}|{}'.format(os.path.abspath(source), 'x'.join(str(int(s)) for s in size) if size else 'native', LAYOUT)
+        return os.path.join(self.path, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def load(self, source, size=None):
+        """ Return image as a read-only (height, width, channels) uint8 array
+
+        :param source: Image file
+        :type source: str
+        :param size: Target (width, height) in pixels, None for native size
+        :type size: tuple
+        """
+        prefix = self._name(source, size)
+        cached = '{}-{}.npy'.format(prefix, os.stat(source).st_mtime_ns)
+        hit = os.path.exists(cached)
+        metrics.cache('assets', hit)
+        if not hit:
+            self._build(source, size, cached)
+            # Drop arrays decoded from earlier versions of the source
+            for stale in glob.glob(prefix + '-*.npy'):
+                if stale != cached:
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+        return np.load(cached, mmap_mode='r')
+
+    def _build(self, source, size, cached):
+        """ Decode, resample and save source image """
+        img = Image.open(source)
+        # Always store colour channels (grayscale and palette images become RGBA)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+        if size and img.size != tuple(int(s) for s in size):
+            img = img.resize((int(size[0]), int(size[1])), Image.BILINEAR)
+        arr = np.asarray(img, dtype=np.uint8)
+        # Write to a temporary file first so readers never see partial arrays
+        tmp = cached + '.tmp.npy'
+        np.save(tmp, arr)
+        os.rename(tmp, cached)
+        logging.debug('Decoded {} to {} ({}x{})'.format(source, cached, arr.shape[1], arr.shape[0]))
@@ -12,12 +12,190 @@ Copyright 2013 Newell Designs, David Newell.
 from __future__ import division
 # Import required modules
 from itertools import product
-import math, datetime, pytz
+import math, logging, datetime, pytz
 from Pysolar import solar
 import numpy as np
 from dateutil.relativedelta import relativedelta
 
 
+# Sun altitudes (degrees) of the per-day irradiance lookup table; 0.05 degree steps keep
+# interpolation error below 1e-5 of the peak value
+RADIATION_TABLE_ALTITUDES = np.linspace(0, 90, 1801)
+
+
+class SolarField(object):
+    """ Solar zenith angle sampled on a regular lon/lat grid
+
+    :param lons: Longitudes of grid columns
+    :type lons: numpy.ndarray
+    :param lats: Latitudes of grid rows
+    :type lats: numpy.ndarray
+    :param zenith: Solar zenith angle in degrees, shape (lats, lons)
+    :type zenith: numpy.ndarray
+    """
+    def __init__(self, lons, lats, zenith):
+        """ Create solar field
+
+        :param lons: Longitudes of grid columns
+        :type lons: numpy.ndarray
+        :param lats: Latitudes of grid rows
+        :type lats: numpy.ndarray
+        :param zenith: Solar zenith angle in degrees, shape (lats, lons)
+        :type zenith: numpy.ndarray
+        """
+        self.lons = lons
+        self.lats = lats
+        self.zenith = zenith
+        self.extent = [lons[0], lons[-1], lats[0], lats[-1]]
+
+    @property
+    def altitude(self):
+        """ Sun altitude in degrees (90 - zenith) """
+        return 90.0 - self.zenith
+
+    def sample(self, lon, lat):
+        """ Bilinear sample of the zenith field at the given point(s)
+
+        :param lon: Longitude(s) of point
+        :type lon: float or array
+        :param lat: Latitude(s) of point
+        :type lat: float or array
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        # Fractional grid indices, clamped to the field
+        x = (lon-self.lons[0])/(self.lons[-1]-self.lons[0])*(self.lons.size-1)
+        y = (lat-self.lats[0])/(self.lats[-1]-self.lats[0])*(self.lats.size-1)
+        x = np.clip(x, 0, self.lons.size-1)
+        y = np.clip(y, 0, self.lats.size-1)
+        x0 = np.minimum(np.floor(x).astype(int), self.lons.size-2)
+        y0 = np.minimum(np.floor(y).astype(int), self.lats.size-2)
+        fx = x-x0
+        fy = y-y0
+        z = self.zenith
+        top = z[y0, x0]*(1-fx) + z[y0, x0+1]*fx
+        bottom = z[y0+1, x0]*(1-fx) + z[y0+1, x0+1]*fx
+        return top*(1-fy) + bottom*fy
+
+
+class FieldTracker(object):
+    """ Derives solar fields (and layers computed from them) by rotating a reference field in longitude,
+    recomputing the reference only when the declination drifts past a tolerance
+
+    :param tolerance: Declination drift (degrees) allowed before a full recompute
+    :type tolerance: float
+    :param verify_every: Compare every Nth rotated field with a full recompute (0 disables)
+    :type verify_every: int
+    :param verify_tolerance: Largest zenith error (degrees) accepted by the check before rebasing
+    :type verify_tolerance: float
+    """
+    def __init__(self, tolerance=0.05, verify_every=0, verify_tolerance=0.5):
+        """ Create field tracker """
+        self.tolerance = tolerance
+        self.verify_every = verify_every
+        self.verify_tolerance = verify_tolerance
+        self.shift = 0.0
+        self.error = None
+        self._ref = None
+        self._frames = 0
+
+    def _period(self, lons):
+        """ Number of unique columns around the globe, or None if the grid does not wrap """
+        step = (lons[-1]-lons[0])/(lons.size-1)
+        if abs(lons[-1]-lons[0]-360) < 1e-6:
+            # First and last columns are the same meridian
+            return lons.size-1
+        if abs(lons[-1]-lons[0]+step-360) < 1e-6:
+            return lons.size
+        return None
+
+    def _roll(self, stack, degrees):
+        """ Sample stacked (..., lat, lon) arrays at lon + degrees with periodic linear interpolation """
+        x = (degrees/self._ref['step']) % self._ref['period']
+        k = int(math.floor(x))
+        frac = x-k
+        cols = (np.arange(stack.shape[-1])+k) % self._ref['period']
+        rolled = stack[..., cols]
+        if frac > 1e-9:
+            rolled = rolled + frac*(stack[..., (cols+1) % self._ref['period']]-rolled)
+        return rolled
+
+    def field(self, dl, resolution, extent):
+        """ Solar field for the daylight object's current time, rotated from the reference when possible
+
+        :param dl: Daylight object set to the render time
+        :type dl: daylight
+        :param resolution: Number of points in mesh (lon, lat)
+        :type resolution: tuple
+        :param extent: Map extent (min lon, max lon, min lat, max lat)
+        :type extent: list
+        """
+        phase, declination = dl.solar_phase()
+        ref = self._ref
+        if ref is not None and ref['key'] == (tuple(resolution), tuple(extent)) and abs(declination-ref['declination']) <= self.tolerance:
+            self.shift = phase-ref['phase']
+            # Rotate zenith and attached layers together
+            ref['current'] = self._roll(ref['stack'], self.shift)
+            field = SolarField(ref['lons'], ref['lats'], ref['current'][0])
+            self._frames += 1
+            if self.verify_every and self._frames % self.verify_every == 0 and not self.verify(dl, field):
+                return self.field(dl, resolution, extent)
+            return field
+        # Full recompute becomes the new reference
+        field = dl.solar_field(resolution=resolution, extent=extent, fast=True)
+        self.shift = 0.0
+        self._frames = 0
+        period = self._period(field.lons)
+        self._ref = None
+        if period is not None:
+            self._ref = {'key': (tuple(resolution), tuple(extent)), 'phase': phase, 'declination': declination,
+                         'lons': field.lons, 'lats': field.lats, 'period': period,
+                         'step': (field.lons[-1]-field.lons[0])/(field.lons.size-1),
+                         'stack': field.zenith[None], 'current': field.zenith[None], 'layers': []}
+        return field
+
+    def verify(self, dl, field):
+        """ Compare a rotated field with a full recompute; drops the reference if the error exceeds verify_tolerance
+
+        :param dl: Daylight object set to the render time
+        :type dl: daylight
+        :param field: Rotated field
+        :type field: SolarField
+        """
+        full = dl.solar_field(resolution=(field.lons.size, field.lats.size), extent=field.extent, fast=True)
+        self.error = float(np.abs(full.zenith-field.zenith).max())
+        if self.error > self.verify_tolerance:
+            logging.warning('Rotated solar field off by {:.3f} deg, recomputing'.format(self.error))
+            self._ref = None
+            return False
+        return True
+
+    def layer(self, name):
+        """ Attached layer rotated to the current time, or None
+
+        :param name: Layer name
+        :type name: str
+        """
+        if self._ref is None or name not in self._ref['layers']:
+            return None
+        return self._ref['current'][1+self._ref['layers'].index(name)]
+
+    def attach(self, name, data):
+        """ Attach a layer derived from the reference field (only taken on the frame the reference was computed)
+
+        :param name: Layer name
+        :type name: str
+        :param data: Layer values, shape (lat, lon)
+        :type data: numpy.ndarray
+        """
+        if self._ref is None or self.shift != 0.0 or name in self._ref['layers']:
+            return False
+        self._ref['stack'] = np.concatenate((self._ref['stack'], data[None]))
+        self._ref['current'] = self._ref['stack']
+        self._ref['layers'].append(name)
+        return True
+
+
 class daylight:
     """ Daylight object for calculating daylight and terminator
 
@@ -30,6 +208,8 @@ class daylight:
         :param now: Current time
         :type now: datetime
         """
+        # Day of the cached irradiance table
+        self._radiation_day = None
         self.set_time(now)
 
     def set_time(self, now=None):
@@ -46,6 +226,26 @@ class daylight:
         # Update constants
         self._update_constants()
 
+    def radiation_table(self):
+        """ Direct irradiation versus sun altitude for the current day, (altitudes, irradiation).
+        Pysolar's direct irradiation depends only on altitude and day of year, so the table is
+        built once per day and applied to any altitude array by interpolation.
+        """
+        day = solar.GetDayOfYear(self.utcNow)
+        if self._radiation_day != day:
+            self._radiation_values = np.array([solar.radiation.GetRadiationDirect(self.utcNow, alt) for alt in RADIATION_TABLE_ALTITUDES])
+            self._radiation_day = day
+        return RADIATION_TABLE_ALTITUDES, self._radiation_values
+
+    def radiation_direct(self, altitude):
+        """ Direct irradiation for sun altitudes (zero with the sun below the horizon)
+
+        :param altitude: Sun altitude (degrees)
+        :type altitude: float or numpy.ndarray
+        """
+        alts, values = self.radiation_table()
+        return np.interp(altitude, alts, values, left=0.0)
+
     def _set_prev_dec(self):
         """ Find the most recent December 31 """
         if self.utcNow.month == 12 and self.utcNow.day == 31:
@@ -149,12 +349,42 @@ class daylight:
         # Calculate sun altitude depending on method requested
         sunAltitude = self.sun_alt_at_point(lon, lat, fast)
         # Calculate direct irradiation
-        irradiation = solar.radiation.GetRadiationDirect(self.utcNow, sunAltitude)
+        irradiation = float(self.radiation_direct(sunAltitude))
         # Return irradiation at specified point
         return irradiation
 
-    def daylight_mesh(self, resolution=(360, 180), extent=[-180, 180, -90, 90], fast=True):
-        """ Calculate irradiation mesh. Returns a numpy array with shape (resolution[0], resolution[1], 4).
+    def _sun_alt_fast(self, lons, lats):
+        """ Vectorized equivalent of Pysolar's GetAltitudeFast
+
+        :param lons: Longitudes
+        :type lons: numpy.ndarray
+        :param lats: Latitudes
+        :type lats: numpy.ndarray
+        """
+        phase, declination = self.solar_phase()
+        declination = math.radians(declination)
+        # Hour angle from solar time at each longitude
+        hourAngle = np.radians(180 - lons - phase)
+        latRad = np.radians(lats)
+        sinAlt = np.cos(latRad) * math.cos(declination) * np.cos(hourAngle) + np.sin(latRad) * math.sin(declination)
+        return np.degrees(np.arcsin(np.clip(sinAlt, -1.0, 1.0)))
+
+    def solar_phase(self):
+        """ (phase, declination) in degrees for the fast altitude formula. The hour angle at longitude lon
+        is 180 - lon - phase, so fields at two times differ by a longitude shift of the phase difference
+        while the declination is unchanged.
+        """
+        # Day numbering as in Pysolar (days since January 1)
+        day = solar.GetDayOfYear(self.utcNow)
+        # Declination and equation of time depend only on the day
+        declination = 23.45 * math.sin((2 * math.pi / 365.0) * (day - 81))
+        b = (2 * math.pi / 364.0) * (day - 81)
+        eot = (9.87 * math.sin(2 * b)) - (7.53 * math.cos(b)) - (1.5 * math.sin(b))
+        # Minutes of solar time advance the hour angle by a quarter degree
+        return ((self.utcNow.hour * 60) + self.utcNow.minute + eot) / 4.0, declination
+
+    def solar_field(self, resolution=(360, 180), extent=[-180, 180, -90, 90], fast=True):
+        """ Calculate solar zenith field. Returns a SolarField with zenith shape (resolution[1], resolution[0]).
 
         :param resolution: Number of points in mesh - (lon, lat) or # to be used for each
         :type resolution: tuple or int
@@ -166,18 +396,38 @@ class daylight:
         # Capture resolution as a tuple
         if type(resolution) is int:
             resolution = (resolution, resolution)
-        # Generate points for daylight mesh grid
+        # Generate points for mesh grid
         lats = np.linspace(extent[2], extent[3], num=resolution[1])
         lons = np.linspace(extent[0], extent[1], num=resolution[0])
+        if fast:
+            lonGrid, latGrid = np.meshgrid(lons, lats)
+            altitude = self._sun_alt_fast(lonGrid, latGrid)
+        else:
+            altitude = np.zeros((resolution[1], resolution[0]))
+            for i, j in product(range(resolution[0]), range(resolution[1])):
+                altitude[j][i] = self.sun_alt_at_point(lons[i], lats[j], False)
+        return SolarField(lons, lats, 90.0 - altitude)
+
+    def daylight_mesh(self, resolution=(360, 180), extent=[-180, 180, -90, 90], fast=True, field=None):
+        """ Calculate irradiation mesh. Returns a numpy array with shape (resolution[0], resolution[1], 4).
+
+        :param resolution: Number of points in mesh - (lon, lat) or # to be used for each
+        :type resolution: tuple or int
+        :param extent: Map extent (min lon, max lon, min lat, max lat)
+        :type extent: list
+        :param fast: Use fast method
+        :type fast: boolean
+        :param field: Precomputed solar field (overrides resolution and extent)
+        :type field: SolarField
+        """
+        # Compute solar field if not shared by caller
+        if field is None:
+            field = self.solar_field(resolution=resolution, extent=extent, fast=fast)
+        altitude = field.altitude
         # Create numpy array of shape (lat x lon x 4)
-        irradiation = np.zeros((resolution[1], resolution[0], 4))
-        # Loop through lats and lons
-        for i, j in product(range(resolution[0]), range(resolution[1])):
-            irradiation[j][i][3] = self.daylight_at_point(lons[i], lats[j], fast)
-        # for i in range(resolution[0]):
-        #     for j in range(resolution[1]):
-        #         # Get irradiation at current lat/lon point (using specified method)
-        #         irradiation[j][i][3] = self.daylight_at_point(lons[i], lats[j], fast)
+        irradiation = np.zeros(altitude.shape + (4,))
+        # Direct irradiation from the day's altitude table (zero with the sun below the horizon)
+        irradiation[:, :, 3] = self.radiation_direct(altitude)
         # Return lists of irradiation points
         return irradiation
 
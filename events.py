@@ -0,0 +1,360 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Pluggable event sources feeding a shared compact point store
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, abc, csv, json, time, logging, importlib
+import numpy as np
+
+
+# Built-in plugins (module:class), imported only when a source using them is enabled
+PLUGINS = {
+    'geojson': 'events:GeoJSONSource',
+    'csv': 'events:CSVSource',
+    'earthquakes': 'events_usgs:EarthquakeSource',
+    'fires': 'events_firms:FireSource'
+}
+
+# Delta operations
+ADD = 'add'
+UPDATE = 'update'
+EXPIRE = 'expire'
+
+# Point record layout
+POINT_DTYPE = np.dtype([
+    ('lon', np.float32),
+    ('lat', np.float32),
+    ('value', np.float32),
+    ('time', np.float64),
+    ('expires', np.float64),
+    ('source', np.uint8),
+    ('live', np.bool_)
+])
+
+
+class Event(object):
+    """ Event reported by a source """
+    __slots__ = ('id', 'lon', 'lat', 'value', 'time')
+
+    def __init__(self, id, lon, lat, value=0.0, time=None):
+        """ Create event
+
+        :param id: Identifier unique within the source
+        :type id: str
+        :param lon: Longitude
+        :type lon: float
+        :param lat: Latitude
+        :type lat: float
+        :param value: Magnitude used for sizing (e.g. earthquake magnitude, fire radiative power)
+        :type value: float
+        :param time: Event time (epoch seconds)
+        :type time: float
+        """
+        self.id = id
+        self.lon = lon
+        self.lat = lat
+        self.value = value
+        self.time = time
+
+    def key(self):
+        """ Values compared to detect updates """
+        return (self.lon, self.lat, self.value, self.time)
+
+
+class EventSource(abc.ABC):
+    """ Base event source. Subclasses implement fetch() returning the current events;
+    poll() turns successive snapshots into add/update/expire deltas.
+
+    :param name: Source name
+    :type name: str
+    :param interval: Seconds between polls
+    :type interval: float
+    :param max_age: Seconds after the event time before it is evicted
+    :type max_age: float
+    """
+    def __init__(self, name, interval=300, max_age=86400, **kwargs):
+        """ Create source """
+        self.name = name
+        self.interval = interval
+        self.max_age = max_age
+        self.last_poll = 0
+        self._known = {}
+
+    @abc.abstractmethod
+    def fetch(self):
+        """ Current events as a list of Event """
+
+    def poll(self, now=None):
+        """ Return (op, event) deltas since the previous poll
+
+        :param now: Current time (epoch seconds)
+        :type now: float
+        """
+        now = time.time() if now is None else now
+        self.last_poll = now
+        current = dict((e.id, e) for e in self.fetch())
+        deltas = []
+        for id, event in current.items():
+            if id not in self._known:
+                deltas.append((ADD, event))
+            elif self._known[id].key() != event.key():
+                deltas.append((UPDATE, event))
+        for id, event in self._known.items():
+            if id not in current:
+                deltas.append((EXPIRE, event))
+        self._known = current
+        return deltas
+
+
+class FileSource(EventSource):
+    """ Event source reading a local file, re-read only when it changes
+
+    :param path: Event file
+    :type path: str
+    """
+    def __init__(self, name, path, **kwargs):
+        """ Create file source """
+        EventSource.__init__(self, name, **kwargs)
+        self.path = path
+        self._mtime = None
+        self._events = []
+
+    def fetch(self):
+        """ Events from file (cached until modified) """
+        mtime = os.path.getmtime(self.path)
+        if mtime != self._mtime:
+            self._events = self.read()
+            self._mtime = mtime
+        return self._events
+
+    @abc.abstractmethod
+    def read(self):
+        """ Parse events from file """
+
+
+class GeoJSONSource(FileSource):
+    """ Point features from a local GeoJSON file
+
+    :param id_property: Feature property holding the id (default feature id)
+    :type id_property: str
+    :param value_property: Feature property used for sizing
+    :type value_property: str
+    :param time_property: Feature property holding the event time (epoch seconds, or milliseconds if ms is set)
+    :type time_property: str
+    """
+    def __init__(self, name, path, id_property=None, value_property=None, time_property=None, ms=False, **kwargs):
+        """ Create GeoJSON source """
+        FileSource.__init__(self, name, path, **kwargs)
+        self.id_property = id_property
+        self.value_property = value_property
+        self.time_property = time_property
+        self.ms = ms
+
+    def parse(self, data):
+        """ Events from parsed GeoJSON """
+        events = []
+        for i, f in enumerate(data.get('features', [])):
+            geom = f.get('geometry') or {}
+            if geom.get('type') != 'Point':
+                continue
+            props = f.get('properties') or {}
+            id = props.get(self.id_property) if self.id_property else f.get('id', i)
+            t = props.get(self.time_property) if self.time_property else None
+            if t is not None and self.ms:
+                t = t/1000.0
+            value = props.get(self.value_property) if self.value_property else None
+            events.append(Event(str(id), float(geom['coordinates'][0]), float(geom['coordinates'][1]),
+                                float(value or 0.0), t))
+        return events
+
+    def read(self):
+        """ Parse events from file """
+        with open(self.path) as f:
+            return self.parse(json.load(f))
+
+
+class CSVSource(FileSource):
+    """ Points from a local CSV file with a header row
+
+    :param lon: Longitude column
+    :type lon: str
+    :param lat: Latitude column
+    :type lat: str
+    :param id: Id column (default longitude/latitude/time)
+    :type id: str
+    :param value: Column used for sizing
+    :type value: str
+    :param time: Time column (epoch seconds)
+    :type time: str
+    """
+    def __init__(self, name, path, lon='longitude', lat='latitude', id=None, value=None, time=None, **kwargs):
+        """ Create CSV source """
+        FileSource.__init__(self, name, path, **kwargs)
+        self.columns = {'lon': lon, 'lat': lat, 'id': id, 'value': value, 'time': time}
+
+    def parse_time(self, row):
+        """ Event time from a row (epoch seconds) """
+        col = self.columns['time']
+        return float(row[col]) if col and row.get(col) else None
+
+    def parse(self, rows):
+        """ Events from CSV rows """
+        c = self.columns
+        events = []
+        for row in rows:
+            try:
+                lon, lat = float(row[c['lon']]), float(row[c['lat']])
+                t = self.parse_time(row)
+            except (KeyError, ValueError):
+                continue
+            id = row[c['id']] if c['id'] else '{}/{}/{}'.format(lon, lat, t)
+            value = float(row[c['value']]) if c['value'] and row.get(c['value']) else 0.0
+            events.append(Event(id, lon, lat, value, t))
+        return events
+
+    def read(self):
+        """ Parse events from file """
+        with open(self.path) as f:
+            return self.parse(csv.DictReader(f))
+
+
+class PointStore(object):
+    """ Compact structured array of live event points shared by all sources
+
+    :param capacity: Initial number of rows
+    :type capacity: int
+    """
+    def __init__(self, capacity=1024):
+        """ Create point store """
+        self.points = np.zeros(capacity, dtype=POINT_DTYPE)
+        self._rows = {}
+        self._free = list(range(capacity-1, -1, -1))
+
+    def __len__(self):
+        """ Number of live points """
+        return len(self._rows)
+
+    def _allocate(self):
+        """ Free row index, growing the array when full """
+        if not self._free:
+            size = len(self.points)
+            self.points = np.concatenate((self.points, np.zeros(size, dtype=POINT_DTYPE)))
+            self._free = list(range(2*size-1, size-1, -1))
+        return self._free.pop()
+
+    def _release(self, key):
+        """ Free the row of a point """
+        row = self._rows.pop(key)
+        self.points['live'][row] = False
+        self._free.append(row)
+
+    def apply(self, source, index, deltas, now=None):
+        """ Apply add/update/expire deltas from a source
+
+        :param source: Event source
+        :type source: EventSource
+        :param index: Source index stored with each point
+        :type index: int
+        :param deltas: (op, event) deltas
+        :type deltas: list
+        """
+        now = time.time() if now is None else now
+        for op, event in deltas:
+            key = (index, event.id)
+            if op == EXPIRE:
+                if key in self._rows:
+                    self._release(key)
+                continue
+            t = event.time if event.time is not None else now
+            if t + source.max_age < now:
+                continue
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = self._allocate()
+            self.points[row] = (event.lon, event.lat, event.value, t, t + source.max_age, index, True)
+
+    def evict(self, now=None):
+        """ Remove points past their expiry time
+
+        :param now: Current time (epoch seconds)
+        :type now: float
+        """
+        now = time.time() if now is None else now
+        stale = [key for key, row in self._rows.items() if self.points['expires'][row] < now]
+        for key in stale:
+            self._release(key)
+        return len(stale)
+
+    def live(self):
+        """ Structured array of live points """
+        return self.points[self.points['live']]
+
+
+def load_plugin(spec):
+    """ Import a source class from a plugin name or module:class spec
+
+    :param spec: Plugin name or module:class
+    :type spec: str
+    """
+    module, cls = PLUGINS.get(spec, spec).split(':')
+    return getattr(importlib.import_module(module), cls)
+
+
+class EventFeed(object):
+    """ Enabled event sources and the point store they feed
+
+    :param sources: Event sources
+    :type sources: list
+    :param styles: Style per source (color, size, scale, icon, alpha)
+    :type styles: list
+    """
+    def __init__(self, sources, styles):
+        """ Create event feed """
+        self.sources = sources
+        self.styles = styles
+        self.store = PointStore()
+
+    @classmethod
+    def from_config(cls, cfg):
+        """ Create feed from the "events" section of the configuration file; disabled sources are never imported
+
+        :param cfg: Source definitions keyed by name ({"plugin": ..., "enabled": ..., "style": {...}, ...})
+        :type cfg: dict
+        """
+        sources = []
+        styles = []
+        for name, params in sorted(cfg.items()):
+            params = dict(params)
+            if not params.pop('enabled', True):
+                continue
+            style = params.pop('style', {})
+            try:
+                sources.append(load_plugin(params.pop('plugin'))(name, **params))
+            except Exception as e:
+                logging.warning('Event source {} disabled: {}'.format(name, e))
+                continue
+            styles.append(style)
+        return cls(sources, styles)
+
+    def update(self, now=None):
+        """ Poll due sources and evict expired points. Failures are isolated per source.
+
+        :param now: Current time (epoch seconds)
+        :type now: float
+        """
+        now = time.time() if now is None else now
+        for index, source in enumerate(self.sources):
+            if now - source.last_poll < source.interval:
+                continue
+            try:
+                self.store.apply(source, index, source.poll(now), now)
+            except Exception as e:
+                source.last_poll = now
+                logging.warning('Event source {} failed: {}'.format(source.name, e))
+        self.store.evict(now)
+        return self.store.live()
@@ -0,0 +1,57 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  NASA FIRMS active fire event source plugin
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import io, csv, calendar, datetime
+import requests
+from events import CSVSource
+
+
+class FireSource(CSVSource):
+    """ Active fire detections from a FIRMS CSV file (url or local path)
+
+    :param url: CSV URL (used when path is not given)
+    :type url: str
+    :param min_confidence: Smallest numeric confidence kept
+    :type min_confidence: float
+    :param timeout: Request timeout in seconds
+    :type timeout: float
+    """
+    def __init__(self, name, url=None, path=None, min_confidence=0, timeout=60, **kwargs):
+        """ Create fire source """
+        CSVSource.__init__(self, name, path, lon='longitude', lat='latitude', value='frp', **kwargs)
+        self.url = url
+        self.min_confidence = min_confidence
+        self.timeout = timeout
+
+    def parse_time(self, row):
+        """ Detection time from acq_date (YYYY-MM-DD) and acq_time (HHMM, UTC) """
+        when = datetime.datetime.strptime('{} {:0>4}'.format(row['acq_date'], row['acq_time']), '%Y-%m-%d %H%M')
+        return calendar.timegm(when.timetuple())
+
+    def parse(self, rows):
+        """ Events from CSV rows, filtered by confidence """
+        kept = []
+        for row in rows:
+            try:
+                confident = float(row.get('confidence') or 0) >= self.min_confidence
+            except ValueError:
+                # Categorical confidence (l/n/h): drop only low
+                confident = row['confidence'] not in ('l', 'low')
+            if confident:
+                kept.append(row)
+        return CSVSource.parse(self, kept)
+
+    def fetch(self):
+        """ Current detections """
+        if self.path:
+            return CSVSource.fetch(self)
+        resp = requests.get(self.url, timeout=self.timeout)
+        resp.raise_for_status()
+        return self.parse(csv.DictReader(io.StringIO(resp.text)))
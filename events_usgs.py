@@ -0,0 +1,37 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  USGS earthquake event source plugin
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import requests
+from events import GeoJSONSource
+
+
+class EarthquakeSource(GeoJSONSource):
+    """ Earthquakes from a USGS GeoJSON summary feed
+
+    :param url: Feed URL
+    :type url: str
+    :param min_magnitude: Smallest magnitude kept
+    :type min_magnitude: float
+    :param timeout: Request timeout in seconds
+    :type timeout: float
+    """
+    def __init__(self, name, url='https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/2.5_day.geojson',
+                 min_magnitude=0.0, timeout=30, **kwargs):
+        """ Create earthquake source """
+        GeoJSONSource.__init__(self, name, path=None, value_property='mag', time_property='time', ms=True, **kwargs)
+        self.url = url
+        self.min_magnitude = min_magnitude
+        self.timeout = timeout
+
+    def fetch(self):
+        """ Current earthquakes from the feed """
+        resp = requests.get(self.url, timeout=self.timeout)
+        resp.raise_for_status()
+        return [e for e in self.parse(resp.json()) if e.value >= self.min_magnitude]
@@ -0,0 +1,99 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Time-bucketed on-disk cache of computed solar fields
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, glob, hashlib, logging
+import numpy as np
+import metrics
+
+
+class FieldCache(object):
+    """ Arrays computed for a render, shared by every render (and config) falling in the same time bucket.
+    Entries are small uncompressed .npz files; the least recently used are evicted beyond max_entries.
+
+    :param path: Cache directory
+    :type path: str
+    :param bucket: Bucket length in seconds (0 disables the cache)
+    :type bucket: int
+    :param max_entries: Number of entries kept on disk
+    :type max_entries: int
+    """
+    def __init__(self, path='cache/daylight', bucket=60, max_entries=64):
+        """ Create field cache """
+        self.path = path
+        self.bucket = int(bucket)
+        self.max_entries = max_entries
+        if self.bucket > 0 and not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _file(self, key, ts):
+        """ Cache file for a key and timestamp """
+        name = '{}|{}'.format('|'.join(str(k) for k in key), int(ts)//self.bucket)
+        return os.path.join(self.path, hashlib.sha1(name.encode('utf-8')).hexdigest() + '.npz')
+
+    def get(self, key, ts):
+        """ Return cached arrays as a dict, or None
+
+        :param key: Parameters the arrays depend on (e.g. kind, resolution, extent, backend)
+        :type key: tuple
+        :param ts: Render time (epoch seconds)
+        :type ts: float
+        """
+        if self.bucket <= 0:
+            return None
+        cached = self._file(key, ts)
+        try:
+            with np.load(cached) as data:
+                arrays = dict((name, data[name]) for name in data.files)
+        except (IOError, OSError, ValueError):
+            metrics.cache('field', False)
+            return None
+        metrics.cache('field', True)
+        # Mark entry as recently used
+        try:
+            os.utime(cached, None)
+        except OSError:
+            pass
+        return arrays
+
+    def put(self, key, ts, **arrays):
+        """ Store arrays for a key and timestamp, evicting least recently used entries
+
+        :param key: Parameters the arrays depend on
+        :type key: tuple
+        :param ts: Render time (epoch seconds)
+        :type ts: float
+        """
+        if self.bucket <= 0:
+            return
+        cached = self._file(key, ts)
+        # Write to a temporary file first so readers never see partial entries
+        tmp = cached + '.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                np.savez(f, **arrays)
+            os.rename(tmp, cached)
+        except (IOError, OSError) as e:
+            logging.warning('Could not cache field {}: {}'.format(key[0], e))
+            return
+        self._evict()
+
+    def _evict(self):
+        """ Remove least recently used entries beyond max_entries """
+        entries = []
+        for entry in glob.glob(os.path.join(self.path, '*.npz')):
+            try:
+                entries.append((os.path.getmtime(entry), entry))
+            except OSError:
+                pass
+        for mtime, entry in sorted(entries)[:max(len(entries) - self.max_entries, 0)]:
+            try:
+                os.remove(entry)
+            except OSError:
+                pass
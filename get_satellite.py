@@ -8,10 +8,18 @@ Copyright 2012 Newell Designs, David Newell.
 """
 
 import requests, json
+import metrics
 
 
-def retrieve_satellite(API_KEY, target_file, config_file):
-    """Retrieve tropical satellite data from Wunderground"""
+@metrics.timed
+def retrieve_satellite(API_KEY, target_file, config_file, base_url='http://api.wunderground.com', timeout=60):
+    """Retrieve tropical satellite data from Wunderground
+
+    :param base_url: API scheme and host (point at replay_server for testing)
+    :type base_url: str
+    :param timeout: Request timeout in seconds
+    :type timeout: float
+    """
     # Load configuration
     cfg = {}
     try:
@@ -24,7 +32,7 @@ def retrieve_satellite(API_KEY, target_file, config_file):
     screen_size = cfg['screen_size'] if 'screen_size' in cfg else (1366, 768)
     img_size = (screen_size[0], screen_size[0]/2)
     # Base API URL
-    url = 'http://api.wunderground.com/api/{0}/satellite/image.png'.format(API_KEY)
+    url = '{0}/api/{1}/satellite/image.png'.format(base_url, API_KEY)
     # url = 'http://api.wunderground.com/api/{0}//radar/satellite/image.png'.format(API_KEY)
     # API Parameters
     # params = {
@@ -64,7 +72,10 @@ def retrieve_satellite(API_KEY, target_file, config_file):
         'proj': 'll'
     }
     # Get image
-    req = requests.get(url, params=params)#, stream=True)
+    try:
+        req = requests.get(url, params=params, timeout=timeout)#, stream=True)
+    except requests.RequestException as e:
+        return {'error': True, 'msg': 'Wunderground API request failed: {}'.format(e)}
     if not req.ok:
         return {'error': True, 'msg': 'Wunderground API image could not be loaded', 'status': req.status_code}
     # Save image to file
@@ -76,7 +87,7 @@ def retrieve_satellite(API_KEY, target_file, config_file):
     with open(target_file, 'wb') as f:
         f.write(req.content)
     # Return complete
-    return {'error': False, 'msg': 'Wunderground API image downloaded successfully', 'url': req.url, 'status': req.status_code}
+    return {'error': False, 'msg': 'Wunderground API image downloaded successfully', 'url': req.url, 'status': req.status_code, 'bytes': len(req.content)}
 
 
 if __name__ == '__main__':
@@ -87,7 +98,9 @@ if __name__ == '__main__':
     parser.add_option("-k", "--key", dest="key", help="Wunderground API key")
     parser.add_option("-t", "--target", dest="target", help="Target image file")
     parser.add_option("-c", "--config", dest="config", help="Configuration file")
+    parser.add_option("-b", "--base-url", dest="base_url", default='http://api.wunderground.com', help="API base URL")
     (options, args) = parser.parse_args()
     # Retrieve tropical weather data from Wunderground API
-    print(retrieve_satellite(options.key, options.target, options.config))
+    # Result (with latency and size) is read by the refresh scheduler
+    print(json.dumps(retrieve_satellite(options.key, options.target, options.config, base_url=options.base_url)))
 
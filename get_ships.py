@@ -8,15 +8,26 @@ Copyright 2014 Newell Designs, David Newell.
 """
 
 import requests, json
+import metrics
 
 
-def retrieve_ship_locations(API_KEY, target_file):
-    """Retrieve ship location data from Fleetmon"""
+@metrics.timed
+def retrieve_ship_locations(API_KEY, target_file, base_url='http://www.marinetraffic.com', timeout=60):
+    """Retrieve ship location data from Fleetmon
+
+    :param base_url: Site scheme and host (point at replay_server for testing)
+    :type base_url: str
+    :param timeout: Request timeout in seconds
+    :type timeout: float
+    """
     # Base API URL
     # url = 'http://www.fleetmon.com/api/p/personal-v1/myfleet/?username=ddnewell&api_key={0}&format=json'.format(API_KEY)
-    url = 'http://www.marinetraffic.com/en/ais/details/ships/9319753/vessel:TOMBARRA'
+    url = '{0}/en/ais/details/ships/9319753/vessel:TOMBARRA'.format(base_url)
     # Get data
-    resp = requests.get(url, headers={'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_9_5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/38.0.2125.101 Safari/537.36'})
+    try:
+        resp = requests.get(url, timeout=timeout, headers={'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_9_5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/38.0.2125.101 Safari/537.36'})
+    except requests.RequestException as e:
+        return {'error': True, 'msg': 'Fleetmon API request failed: {}'.format(e)}
     if not resp.ok:
         return {'error': True, 'msg': 'Could not load Fleetmon API data'}
     try:
@@ -25,10 +36,13 @@ def retrieve_ship_locations(API_KEY, target_file):
     except:
         return {'error': True, 'msg': 'Could not parse Fleetmon API data'}
     # Save data to file
-    rd1 = raw_data.split('centerx:')[1]
-    rd2 = rd1.split('/centery:')
-    lon = float(rd2[0])
-    lat = float(rd2[1].split('/zoom')[0])
+    try:
+        rd1 = raw_data.split('centerx:')[1]
+        rd2 = rd1.split('/centery:')
+        lon = float(rd2[0])
+        lat = float(rd2[1].split('/zoom')[0])
+    except (IndexError, ValueError):
+        return {'error': True, 'msg': 'Could not find vessel position in page'}
     data = {
         'objects': [
             {'vessel': {
@@ -41,7 +55,7 @@ def retrieve_ship_locations(API_KEY, target_file):
     with open(target_file, 'w') as f:
         json.dump(data, f)
     # Return complete
-    return {'error': False, 'msg': 'Fleetmon API data downloaded successfully'}
+    return {'error': False, 'msg': 'Fleetmon API data downloaded successfully', 'bytes': len(resp.content)}
 
 
 if __name__ == '__main__':
@@ -52,7 +66,9 @@ if __name__ == '__main__':
     parser.add_option("-k", "--key", dest="key", help="Fleetmon API key")
     parser.add_option("-t", "--target", dest="target", help="Target json file")
     parser.add_option("-c", "--config", dest="config", help="Configuration file")
+    parser.add_option("-b", "--base-url", dest="base_url", default='http://www.marinetraffic.com', help="Site base URL")
     (options, args) = parser.parse_args()
     # Retrieve ship location data from Fleetmon API
-    retrieve_ship_locations(options.key, options.target)
+    # Result (with latency and size) is read by the refresh scheduler
+    print(json.dumps(retrieve_ship_locations(options.key, options.target, base_url=options.base_url)))
 
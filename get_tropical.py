@@ -8,14 +8,25 @@ Copyright 2012 Newell Designs, David Newell.
 """
 
 import requests, json
+import metrics
 
 
-def retrieve_tropical_wx(API_KEY, target_file):
-    """Retrieve tropical weather data from Wunderground"""
+@metrics.timed
+def retrieve_tropical_wx(API_KEY, target_file, base_url='http://api.wunderground.com', timeout=60):
+    """Retrieve tropical weather data from Wunderground
+
+    :param base_url: API scheme and host (point at replay_server for testing)
+    :type base_url: str
+    :param timeout: Request timeout in seconds
+    :type timeout: float
+    """
     # Base API URL
-    url = 'http://api.wunderground.com/api/{0}/currenthurricane/view.json'.format(API_KEY)
+    url = '{0}/api/{1}/currenthurricane/view.json'.format(base_url, API_KEY)
     # Get data
-    resp = requests.get(url)
+    try:
+        resp = requests.get(url, timeout=timeout)
+    except requests.RequestException as e:
+        return {'error': True, 'msg': 'Wunderground API request failed: {}'.format(e)}
     if not resp.ok:
         return {'error': True, 'msg': 'Could not load Wunderground API data'}
     try:
@@ -26,7 +37,7 @@ def retrieve_tropical_wx(API_KEY, target_file):
     with open(target_file, 'w') as f:
         json.dump(data, f)
     # Return complete
-    return {'error': False, 'msg': 'Wunderground API data downloaded successfully'}
+    return {'error': False, 'msg': 'Wunderground API data downloaded successfully', 'bytes': len(resp.content)}
 
 
 if __name__ == '__main__':
@@ -37,7 +48,9 @@ if __name__ == '__main__':
     parser.add_option("-k", "--key", dest="key", help="Wunderground API key")
     parser.add_option("-t", "--target", dest="target", help="Target image file")
     parser.add_option("-c", "--config", dest="config", help="Configuration file")
+    parser.add_option("-b", "--base-url", dest="base_url", default='http://api.wunderground.com', help="API base URL")
     (options, args) = parser.parse_args()
     # Retrieve tropical weather data from Wunderground API
-    retrieve_tropical_wx(options.key, options.target)
+    # Result (with latency and size) is read by the refresh scheduler
+    print(json.dumps(retrieve_tropical_wx(options.key, options.target, base_url=options.base_url)))
 
@@ -0,0 +1,209 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Counters, gauges and histograms exported in Prometheus text format
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, time, bisect, logging, threading, functools
+
+
+# Default histogram buckets (seconds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Metric name -> (type, help)
+METRICS = {
+    'geis_layer_seconds': ('histogram', 'Layer preparation and drawing time'),
+    'geis_layer_failures_total': ('counter', 'Layers that failed to prepare or draw'),
+    'geis_frame_seconds': ('histogram', 'Frame rasterization and encoding time'),
+    'geis_frames_total': ('counter', 'Frames rendered'),
+    'geis_last_frame_timestamp_seconds': ('gauge', 'Time the last frame was saved'),
+    'geis_fetch_seconds': ('histogram', 'Data source fetch latency'),
+    'geis_fetch_bytes_total': ('counter', 'Bytes downloaded by data source fetches'),
+    'geis_fetch_total': ('counter', 'Data source fetches by result'),
+    'geis_cache_requests_total': ('counter', 'Cache lookups by cache and result (hit or miss)'),
+    'geis_data_age_seconds': ('gauge', 'Age of the data file of each source'),
+    'geis_daylight_shift_error_degrees': ('gauge', 'Zenith error of the rotated solar field at the last verification')
+}
+
+
+class Registry(object):
+    """ Thread-safe metric values. Updates are a dict lookup under a lock, cheap enough to leave on. """
+    def __init__(self):
+        """ Create registry """
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _series(self, name, labels):
+        """ Series key for a metric name and labels """
+        return (name, tuple(sorted(labels.items())))
+
+    def inc(self, name, value=1, **labels):
+        """ Increase counter
+
+        :param name: Metric name
+        :type name: str
+        :param value: Increment
+        :type value: float
+        """
+        key = self._series(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """ Set gauge
+
+        :param name: Metric name
+        :type name: str
+        :param value: Value
+        :type value: float
+        """
+        key = self._series(name, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def observe(self, name, value, **labels):
+        """ Add observation to histogram
+
+        :param name: Metric name
+        :type name: str
+        :param value: Observed value
+        :type value: float
+        """
+        key = self._series(name, labels)
+        with self._lock:
+            hist = self._values.get(key)
+            if hist is None:
+                hist = self._values[key] = [[0]*len(BUCKETS), 0.0, 0]
+            i = bisect.bisect_left(BUCKETS, value)
+            if i < len(BUCKETS):
+                hist[0][i] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    def render(self):
+        """ Metrics in Prometheus text exposition format """
+        with self._lock:
+            values = sorted((k, (list(v[0]), v[1], v[2]) if isinstance(v, list) else v) for k, v in self._values.items())
+        lines = []
+        current = None
+        for (name, labels), value in values:
+            if name != current:
+                current = name
+                kind, text = METRICS.get(name, ('untyped', name))
+                lines.append('# HELP {} {}'.format(name, text))
+                lines.append('# TYPE {} {}'.format(name, kind))
+            if not isinstance(value, tuple):
+                lines.append('{}{} {}'.format(name, _labels(labels), _number(value)))
+                continue
+            # Histogram buckets are cumulative
+            counts, total, count = value
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append('{}_bucket{} {}'.format(name, _labels(labels + (('le', _number(bound)),)), cumulative))
+            lines.append('{}_bucket{} {}'.format(name, _labels(labels + (('le', '+Inf'),)), count))
+            lines.append('{}_sum{} {}'.format(name, _labels(labels), _number(total)))
+            lines.append('{}_count{} {}'.format(name, _labels(labels), count))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """ Write metrics file atomically (e.g. for the node_exporter textfile collector)
+
+        :param path: Output file
+        :type path: str
+        """
+        tmp = path + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                f.write(self.render())
+            os.rename(tmp, path)
+        except (IOError, OSError) as e:
+            logging.warning('Could not write metrics to {}: {}'.format(path, e))
+
+
+def _labels(labels):
+    """ Format label pairs """
+    if not labels:
+        return ''
+    escape = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join('{}="{}"'.format(k, escape(v)) for k, v in labels) + '}'
+
+
+def _number(value):
+    """ Format a sample value """
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Process-wide registry
+REGISTRY = Registry()
+inc = REGISTRY.inc
+gauge = REGISTRY.set
+observe = REGISTRY.observe
+
+
+class timer(object):
+    """ Context manager observing elapsed seconds into a histogram
+
+    :param name: Metric name
+    :type name: str
+    """
+    def __init__(self, name, **labels):
+        """ Create timer """
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.time() - self.start
+        observe(self.name, self.elapsed, **self.labels)
+        return False
+
+
+def cache(name, hit):
+    """ Count a cache lookup
+
+    :param name: Cache name
+    :type name: str
+    :param hit: Whether the lookup was served from the cache
+    :type hit: boolean
+    """
+    inc('geis_cache_requests_total', cache=name, result='hit' if hit else 'miss')
+
+
+def record_fetch(source, result):
+    """ Record a fetch result dict ({'error', 'seconds', 'bytes', ...}) as returned by the get_* fetchers
+
+    :param source: Source name
+    :type source: str
+    :param result: Fetch result
+    :type result: dict
+    """
+    inc('geis_fetch_total', source=source, result='error' if result.get('error') else 'ok')
+    if result.get('seconds') is not None:
+        observe('geis_fetch_seconds', result['seconds'], source=source)
+    if result.get('bytes'):
+        inc('geis_fetch_bytes_total', result['bytes'], source=source)
+
+
+def timed(fn):
+    """ Decorate a get_* retrieve function to add the call duration as 'seconds' to its result dict.
+    Fetchers run as separate processes and print this result as JSON; the scheduler records it (record_fetch),
+    so nothing is recorded here.
+
+    :param fn: Retrieve function returning a result dict
+    :type fn: function
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.time()
+        result = fn(*args, **kwargs)
+        result.setdefault('seconds', time.time() - start)
+        return result
+    return wrapper
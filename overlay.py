@@ -0,0 +1,128 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Vector overlays with cached per-resolution simplification and spatial index culling
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, json, pickle, hashlib, logging
+import numpy as np
+import shapely.geometry as sgeom
+import shapely.wkb
+from shapely.strtree import STRtree
+from matplotlib.path import Path
+
+
+def read_features(path):
+    """ Read (geometry, properties) pairs from a GeoJSON file or shapefile
+
+    :param path: GeoJSON (.json/.geojson) or shapefile (.shp)
+    :type path: str
+    """
+    if path.lower().endswith('.shp'):
+        # Shapefiles are read through cartopy (pyshp) only when used
+        from cartopy.io import shapereader
+        return [(r.geometry, r.attributes) for r in shapereader.Reader(path).records() if r.geometry is not None]
+    with open(path) as f:
+        data = json.load(f)
+    features = data['features'] if data.get('type') == 'FeatureCollection' else [data]
+    return [(sgeom.shape(f['geometry']), f.get('properties') or {}) for f in features if f.get('geometry')]
+
+
+def geometry_paths(geom):
+    """ Split a geometry into line coordinate arrays and polygon paths
+
+    :param geom: Geometry
+    :type geom: shapely geometry
+    """
+    lines = []
+    polygons = []
+    parts = getattr(geom, 'geoms', [geom])
+    for part in parts:
+        if part.is_empty:
+            continue
+        if part.geom_type == 'Polygon':
+            rings = [np.asarray(part.exterior.coords)[:, :2]] + [np.asarray(r.coords)[:, :2] for r in part.interiors]
+            polygons.append(Path.make_compound_path(*[Path(r, closed=True) for r in rings]))
+        elif part.geom_type in ('LineString', 'LinearRing'):
+            lines.append(np.asarray(part.coords)[:, :2])
+        elif hasattr(part, 'geoms'):
+            l, p = geometry_paths(part)
+            lines.extend(l)
+            polygons.extend(p)
+    return lines, polygons
+
+
+class VectorOverlay(object):
+    """ Vector features simplified per output resolution, cached on disk and culled by an STRtree
+
+    :param path: GeoJSON file or shapefile
+    :type path: str
+    :param cache_dir: Directory for simplified geometry caches
+    :type cache_dir: str
+    """
+    def __init__(self, path, cache_dir='cache/overlays'):
+        """ Create overlay """
+        self.path = path
+        self.cache_dir = cache_dir
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        # Simplified (geometries, properties, tree) keyed by (mtime, tolerance)
+        self._levels = {}
+
+    def _cache_file(self, mtime, tolerance):
+        """ Cache filename for the simplified features """
+        key = '{}|{}|{:.6g}'.format(os.path.abspath(self.path), mtime, tolerance)
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.pkl')
+
+    def level(self, tolerance):
+        """ Simplified (geometries, properties, STRtree) for a tolerance in degrees
+
+        :param tolerance: Simplification tolerance (degrees)
+        :type tolerance: float
+        """
+        mtime = os.path.getmtime(self.path)
+        key = (mtime, tolerance)
+        if key in self._levels:
+            return self._levels[key]
+        cache = self._cache_file(mtime, tolerance)
+        if os.path.exists(cache):
+            with open(cache, 'rb') as f:
+                wkbs, props = pickle.load(f)
+            geoms = [shapely.wkb.loads(w) for w in wkbs]
+        else:
+            geoms = []
+            props = []
+            for geom, p in read_features(self.path):
+                simple = geom.simplify(tolerance, preserve_topology=True)
+                if not simple.is_empty:
+                    geoms.append(simple)
+                    props.append(p)
+            tmp = cache + '.tmp'
+            with open(tmp, 'wb') as f:
+                pickle.dump(([g.wkb for g in geoms], props), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp, cache)
+            logging.debug('Simplified {} features from {} at {:.4g} deg'.format(len(geoms), self.path, tolerance))
+        self._levels = {key: (geoms, props, STRtree(geoms) if geoms else None)}
+        return self._levels[key]
+
+    def query(self, extent, tolerance):
+        """ Simplified (geometry, properties) pairs intersecting extent
+
+        :param extent: Map extent (min lon, max lon, min lat, max lat)
+        :type extent: list
+        :param tolerance: Simplification tolerance (degrees)
+        :type tolerance: float
+        """
+        geoms, props, tree = self.level(tolerance)
+        if tree is None:
+            return []
+        hits = tree.query(sgeom.box(extent[0], extent[2], extent[1], extent[3]))
+        if len(hits) and not isinstance(hits[0], (int, np.integer)):
+            # Shapely < 2 returns geometries instead of indices
+            ids = dict((id(g), i) for i, g in enumerate(geoms))
+            hits = [ids[id(g)] for g in hits]
+        return [(geoms[i], props[i]) for i in sorted(hits)]
@@ -0,0 +1,206 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Dependency-aware layer pipeline driven by configuration
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, json, time, logging, threading
+import metrics
+from concurrent import futures
+
+
+# Shipped configuration whose "layers" list is used when a configuration file has none
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'json', 'config.json')
+
+
+class Layer(object):
+    """ Pipeline layer
+
+    :param name: Layer name
+    :type name: str
+    :param method: Plot method drawing the layer (its prepare_* counterpart is run in the worker pool)
+    :type method: str
+    :param args: Keyword arguments for the draw and prepare methods
+    :type args: dict
+    :param inputs: Scheduler sources refreshed before preparing
+    :type inputs: list
+    :param depends: Layers that must be prepared first
+    :type depends: list
+    :param zorder: Draw order
+    :type zorder: float
+    :param timeout: Seconds allowed for preparation
+    :type timeout: float
+    :param refresh_timeout: Seconds preparation waits for due inputs before using the files already on disk
+    :type refresh_timeout: float
+    """
+    def __init__(self, name, method, args=None, inputs=None, depends=None, zorder=0, timeout=60, refresh_timeout=10, enabled=True):
+        """ Create layer """
+        self.name = name
+        self.method = method
+        self.args = args or {}
+        self.inputs = inputs or []
+        self.depends = depends or []
+        self.zorder = zorder
+        self.timeout = timeout
+        self.refresh_timeout = refresh_timeout
+        self.enabled = enabled
+
+    def prepare_method(self):
+        """ Name of the Plot method preparing this layer (plot_x/load_x -> prepare_x) """
+        return 'prepare_' + self.method.split('_', 1)[1]
+
+
+class Pipeline(object):
+    """ Prepare independent layers concurrently, then draw all layers in one ordered pass
+
+    :param plot: Map plot
+    :type plot: wmap.Plot
+    :param layers: Layers
+    :type layers: list
+    :param workers: Worker pool size
+    :type workers: int
+    """
+    def __init__(self, plot, layers, workers=4):
+        """ Create pipeline """
+        self.plot = plot
+        self.layers = [l for l in layers if l.enabled]
+        self.workers = workers
+        self._order = self._sort()
+
+    @classmethod
+    def from_config(cls, plot, config_file):
+        """ Create pipeline from the "layers" list of the configuration file
+
+        :param plot: Map plot
+        :type plot: wmap.Plot
+        :param config_file: Configuration filename
+        :type config_file: str
+        """
+        with open(config_file) as f:
+            c = json.load(f)
+        cfg = c['config'] if 'config' in c else {}
+        if 'layers' not in c:
+            with open(DEFAULT_CONFIG) as f:
+                c['layers'] = json.load(f)['layers']
+        layers = c['layers']
+        return cls(plot, [Layer(**l) for l in layers], workers=cfg['pipeline_workers'] if 'pipeline_workers' in cfg else 4)
+
+    def _sort(self):
+        """ Topologically sort layers by dependencies """
+        names = dict((l.name, l) for l in self.layers)
+        order = []
+        state = {}
+
+        def visit(layer, path):
+            if state.get(layer.name) == 'done':
+                return
+            if state.get(layer.name) == 'visiting':
+                raise Exception('Layer dependency cycle: {}'.format(' -> '.join(path + [layer.name])))
+            state[layer.name] = 'visiting'
+            for dep in layer.depends:
+                if dep not in names:
+                    raise Exception('Layer {} depends on unknown layer {}'.format(layer.name, dep))
+                visit(names[dep], path + [layer.name])
+            state[layer.name] = 'done'
+            order.append(layer)
+
+        for layer in self.layers:
+            visit(layer, [])
+        return order
+
+    def _prepare(self, layer, wait, cancelled):
+        """ Refresh layer inputs and run its prepare method (worker thread) """
+        if layer.inputs:
+            # Fetches still running after the refresh budget finish in the background; the freshest file on disk is used meanwhile
+            self.plot.scheduler.refresh(layer.inputs, wait=wait, timeout=layer.refresh_timeout)
+        if cancelled.is_set():
+            raise Exception('cancelled')
+        prepare = getattr(self.plot, layer.prepare_method(), None)
+        if prepare is not None:
+            with metrics.timer('geis_layer_seconds', layer=layer.name, stage='prepare'):
+                prepare(**layer.args)
+
+    def prepare(self, wait=True):
+        """ Prepare all layers concurrently in dependency order. Returns names of failed layers.
+
+        :param wait: Wait for due input sources (otherwise fetch in background)
+        :type wait: boolean
+        """
+        failed = set()
+        pending = {}
+        deadlines = {}
+        cancelled = threading.Event()
+        pool = futures.ThreadPoolExecutor(max_workers=self.workers)
+
+        # A layer waits on its dependencies' futures first (re-raising their failures)
+        def run(layer, deps):
+            for dep in deps:
+                dep.result()
+            if cancelled.is_set():
+                raise Exception('cancelled')
+            return self._prepare(layer, wait, cancelled)
+
+        # Submit in topological order so dependencies are queued first; deadlines run from submission
+        for layer in self._order:
+            deps = [pending[d] for d in layer.depends]
+            deadlines[layer.name] = time.time() + layer.timeout + (layer.refresh_timeout if layer.inputs and wait else 0)
+            pending[layer.name] = pool.submit(run, layer, deps)
+        for layer in self._order:
+            start = time.time()
+            # Layers depending on a failed or timed out layer fail without waiting for it
+            if any(d in failed for d in layer.depends):
+                logging.warning('Layer {} skipped: dependency failed'.format(layer.name))
+                failed.add(layer.name)
+                metrics.inc('geis_layer_failures_total', layer=layer.name, stage='prepare')
+                continue
+            try:
+                pending[layer.name].result(timeout=max(0, deadlines[layer.name] - time.time()))
+            except futures.TimeoutError:
+                logging.warning('Layer {} preparation timed out after {}s'.format(layer.name, layer.timeout))
+                failed.add(layer.name)
+                metrics.inc('geis_layer_failures_total', layer=layer.name, stage='prepare')
+            except Exception as e:
+                logging.warning('Layer {} preparation failed: {}'.format(layer.name, e))
+                failed.add(layer.name)
+                metrics.inc('geis_layer_failures_total', layer=layer.name, stage='prepare')
+            logging.debug('Layer {} prepared in {:.3f}s'.format(layer.name, time.time() - start))
+        # Drop work not yet started so only prepare calls already running can overlap the draw pass
+        cancelled.set()
+        for future in pending.values():
+            future.cancel()
+        # Do not block on timed out layers
+        pool.shutdown(wait=False)
+        return failed
+
+    def draw(self, skip=()):
+        """ Draw layers in z-order, isolating failures
+
+        :param skip: Layer names not drawn
+        :type skip: set
+        """
+        failed = set(skip)
+        self.plot.create_map()
+        for layer in sorted(self._order, key=lambda l: l.zorder):
+            if layer.name in failed or any(d in failed for d in layer.depends):
+                failed.add(layer.name)
+                continue
+            try:
+                with metrics.timer('geis_layer_seconds', layer=layer.name, stage='draw'):
+                    getattr(self.plot, layer.method)(**layer.args)
+            except Exception as e:
+                logging.warning('Layer {} failed to draw: {}'.format(layer.name, e))
+                failed.add(layer.name)
+                metrics.inc('geis_layer_failures_total', layer=layer.name, stage='draw')
+        return failed
+
+    def run(self, wait=True):
+        """ Prepare and draw all layers. Returns names of failed layers.
+
+        :param wait: Wait for due input sources (otherwise fetch in background)
+        :type wait: boolean
+        """
+        return self.draw(skip=self.prepare(wait=wait))
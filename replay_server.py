@@ -0,0 +1,260 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Local record/replay HTTP stand-in for the fetcher modules
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, time, json, random, socket, hashlib, logging, threading
+try:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.request import urlopen, Request
+    from urllib.error import HTTPError, URLError
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib2 import urlopen, Request, HTTPError, URLError
+
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+
+# Response headers kept when recording
+KEEP_HEADERS = ('Content-Type', 'Content-Encoding', 'Last-Modified', 'ETag')
+
+
+def cassette_key(method, path):
+    """ Key for a recorded response
+
+    :param method: HTTP method
+    :type method: str
+    :param path: Request path including query string
+    :type path: str
+    """
+    return hashlib.sha1('{} {}'.format(method, path).encode('utf-8')).hexdigest()
+
+
+class Cassette(object):
+    """ Directory of recorded responses
+
+    :param path: Cassette directory
+    :type path: str
+    """
+    def __init__(self, path):
+        """ Create cassette """
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def load(self, method, path):
+        """ Return recorded (status, headers, body) or None """
+        key = os.path.join(self.path, cassette_key(method, path))
+        if not os.path.exists(key + '.json'):
+            return None
+        with open(key + '.json') as f:
+            meta = json.load(f)
+        with open(key + '.body', 'rb') as f:
+            body = f.read()
+        return meta['status'], meta['headers'], body
+
+    def save(self, method, path, status, headers, body):
+        """ Record a response """
+        key = os.path.join(self.path, cassette_key(method, path))
+        with open(key + '.body', 'wb') as f:
+            f.write(body)
+        with open(key + '.json', 'w') as f:
+            json.dump({'method': method, 'path': path, 'status': status, 'headers': headers}, f, indent=2)
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """ Serve recorded responses, recording from upstream first when in record mode """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        """ Route request log through logging """
+        logging.debug(fmt % args)
+
+    def do_GET(self):
+        """ Handle GET request """
+        opts = self.server.options
+        # Error injection: hang past client timeouts or fail outright
+        if random.random() < opts['hang_rate']:
+            time.sleep(opts['hang'])
+        if random.random() < opts['error_rate']:
+            return self._send(opts['error_status'], {'Content-Type': 'text/plain'}, b'injected error')
+        response = self.server.cassette.load('GET', self.path)
+        if response is None and opts['upstream']:
+            response = self._record()
+        if response is None:
+            return self._send(404, {'Content-Type': 'text/plain'}, b'no recording for ' + self.path.encode('utf-8'))
+        # Latency before first byte
+        time.sleep(max(0, opts['latency'] + random.uniform(-opts['latency_jitter'], opts['latency_jitter'])))
+        self._send(*response)
+
+    def _record(self):
+        """ Fetch response from upstream and save it to the cassette """
+        req = Request(self.server.options['upstream'] + self.path, headers={'User-Agent': self.headers.get('User-Agent', 'geis-replay')})
+        try:
+            resp = urlopen(req, timeout=60)
+            status, body = resp.getcode(), resp.read()
+        except HTTPError as e:
+            resp = e
+            status, body = e.code, e.read()
+        except (URLError, socket.timeout) as e:
+            # Upstream unreachable or too slow: answer as a gateway, without recording
+            reason = getattr(e, 'reason', e)
+            status = 504 if isinstance(reason, socket.timeout) else 502
+            logging.warning('Upstream request for {} failed: {}'.format(self.path, reason))
+            return status, {'Content-Type': 'text/plain'}, 'upstream error: {}'.format(reason).encode('utf-8')
+        headers = dict((h, resp.headers[h]) for h in KEEP_HEADERS if resp.headers.get(h))
+        self.server.cassette.save('GET', self.path, status, headers, body)
+        logging.info('Recorded {} ({} bytes)'.format(self.path, len(body)))
+        return status, headers, body
+
+    def _send(self, status, headers, body):
+        """ Send response, throttled to configured bandwidth """
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        bandwidth = self.server.options['bandwidth']
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        # Write in 1/20 s chunks to approximate the bandwidth limit
+        chunk = max(1, int(bandwidth / 20))
+        for i in range(0, len(body), chunk):
+            self.wfile.write(body[i:i+chunk])
+            self.wfile.flush()
+            time.sleep(len(body[i:i+chunk]) / bandwidth)
+
+
+def serve(cassette, port=8765, upstream=None, latency=0.0, latency_jitter=0.0, bandwidth=None,
+          error_rate=0.0, error_status=503, hang_rate=0.0, hang=30.0):
+    """ Create stand-in server (call serve_forever to run)
+
+    :param cassette: Cassette directory
+    :type cassette: str
+    :param port: Local port
+    :type port: int
+    :param upstream: Upstream base URL to record from on a cache miss (record mode)
+    :type upstream: str
+    :param latency: Seconds before each response
+    :type latency: float
+    :param latency_jitter: Random +/- seconds added to latency
+    :type latency_jitter: float
+    :param bandwidth: Bytes per second (None for unlimited)
+    :type bandwidth: float
+    :param error_rate: Fraction of requests answered with error_status
+    :type error_rate: float
+    :param error_status: HTTP status for injected errors
+    :type error_status: int
+    :param hang_rate: Fraction of requests delayed by hang seconds
+    :type hang_rate: float
+    :param hang: Seconds to hang
+    :type hang: float
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), ReplayHandler)
+    server.cassette = Cassette(cassette)
+    server.options = {
+        'upstream': upstream.rstrip('/') if upstream else None,
+        'latency': latency,
+        'latency_jitter': latency_jitter,
+        'bandwidth': bandwidth,
+        'error_rate': error_rate,
+        'error_status': error_status,
+        'hang_rate': hang_rate,
+        'hang': hang
+    }
+    return server
+
+
+def benchmark(fetch, requests=100, concurrency=4):
+    """ Call fetch() repeatedly from a thread pool and summarize latency and errors
+
+    :param fetch: Function returning a fetcher result dict ({'error': bool, ...})
+    :type fetch: function
+    :param requests: Number of calls
+    :type requests: int
+    :param concurrency: Number of concurrent callers
+    :type concurrency: int
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def worker():
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            start = time.time()
+            try:
+                failed = fetch()['error']
+            except Exception:
+                failed = True
+            elapsed = time.time() - start
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += failed
+
+    start = time.time()
+    threads = [threading.Thread(target=worker) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.time() - start
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies)-1, int(p*len(latencies)))] if latencies else None
+    return {'requests': requests, 'concurrency': concurrency, 'seconds': total,
+            'throughput': requests / total if total else None, 'errors': errors[0],
+            'p50': pct(0.5), 'p90': pct(0.9), 'p99': pct(0.99), 'max': latencies[-1] if latencies else None}
+
+
+if __name__ == '__main__':
+    # Import command line argument parser
+    from optparse import OptionParser
+    # Parse for options
+    parser = OptionParser(usage='%prog [serve|bench] [options]')
+    parser.add_option("-d", "--cassette", dest="cassette", default='data/cassette', help="Recorded responses directory")
+    parser.add_option("-p", "--port", dest="port", type="int", default=8765, help="Local port")
+    parser.add_option("-u", "--upstream", dest="upstream", help="Record mode: upstream base URL (e.g. http://api.wunderground.com)")
+    parser.add_option("-l", "--latency", dest="latency", type="float", default=0.0, help="Response latency in seconds")
+    parser.add_option("-j", "--jitter", dest="jitter", type="float", default=0.0, help="Latency jitter in seconds")
+    parser.add_option("-w", "--bandwidth", dest="bandwidth", type="float", help="Bandwidth in bytes per second")
+    parser.add_option("-e", "--error-rate", dest="error_rate", type="float", default=0.0, help="Fraction of requests failing")
+    parser.add_option("--hang-rate", dest="hang_rate", type="float", default=0.0, help="Fraction of requests hanging")
+    parser.add_option("--hang", dest="hang", type="float", default=30.0, help="Seconds a hanging request waits")
+    parser.add_option("-f", "--fetcher", dest="fetcher", default='tropical', help="Bench: satellite, tropical or ships")
+    parser.add_option("-k", "--key", dest="key", default='replay', help="Bench: API key passed to fetcher")
+    parser.add_option("-n", "--requests", dest="requests", type="int", default=100, help="Bench: number of fetches")
+    parser.add_option("-c", "--concurrency", dest="concurrency", type="int", default=4, help="Bench: concurrent fetches")
+    parser.add_option("-t", "--timeout", dest="timeout", type="float", default=10.0, help="Bench: fetcher timeout in seconds")
+    (options, args) = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args and args[0] == 'bench':
+        import tempfile
+        base_url = 'http://127.0.0.1:{}'.format(options.port)
+        target = os.path.join(tempfile.mkdtemp(), 'bench.out')
+        if options.fetcher == 'satellite':
+            import get_satellite
+            fetch = lambda: get_satellite.retrieve_satellite(options.key, target, 'json/config.json', base_url=base_url, timeout=options.timeout)
+        elif options.fetcher == 'ships':
+            import get_ships
+            fetch = lambda: get_ships.retrieve_ship_locations(options.key, target, base_url=base_url, timeout=options.timeout)
+        else:
+            import get_tropical
+            fetch = lambda: get_tropical.retrieve_tropical_wx(options.key, target, base_url=base_url, timeout=options.timeout)
+        print(benchmark(fetch, options.requests, options.concurrency))
+    else:
+        server = serve(options.cassette, options.port, options.upstream, options.latency, options.jitter,
+                       options.bandwidth, options.error_rate, hang_rate=options.hang_rate, hang=options.hang)
+        logging.info('Serving {} on port {}'.format(options.cassette, options.port))
+        server.serve_forever()
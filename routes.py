@@ -0,0 +1,107 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Vectorized great circle routes
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+from __future__ import division
+
+import numpy as np
+
+
+def _to_xyz(lonlat):
+    """ Convert (N, 2) lon/lat degrees to (N, 3) unit vectors """
+    lon = np.radians(lonlat[:, 0])
+    lat = np.radians(lonlat[:, 1])
+    return np.column_stack((np.cos(lat)*np.cos(lon), np.cos(lat)*np.sin(lon), np.sin(lat)))
+
+
+def great_circle_points(origins, destinations, npts=64):
+    """ Intermediate great circle points for every route in one slerp. Returns (N, npts, 2) lon/lat.
+
+    :param origins: Route start points (lon, lat), shape (N, 2)
+    :type origins: array
+    :param destinations: Route end points (lon, lat), shape (N, 2)
+    :type destinations: array
+    :param npts: Points per route including both ends
+    :type npts: int
+    """
+    p0 = _to_xyz(np.asarray(origins, dtype=float).reshape(-1, 2))
+    p1 = _to_xyz(np.asarray(destinations, dtype=float).reshape(-1, 2))
+    cosOmega = np.clip(np.einsum('ij,ij->i', p0, p1), -1.0, 1.0)[:, None]
+    omega = np.arccos(cosOmega)
+    # Direction of travel at the origin, perpendicular to it in the plane of the route
+    u = p1 - cosOmega*p0
+    norm = np.linalg.norm(u, axis=1, keepdims=True)
+    # Antipodal (and coincident) endpoints have no unique great circle; route them over the north pole
+    # (or along the prime meridian when starting at a pole)
+    degenerate = norm < 1e-9
+    axis = np.where(np.abs(p0[:, 2:]) > 1 - 1e-9, [[1.0, 0.0, 0.0]], [[0.0, 0.0, 1.0]])
+    axis -= np.einsum('ij,ij->i', axis, p0)[:, None]*p0
+    axis /= np.linalg.norm(axis, axis=1, keepdims=True)
+    u = np.where(degenerate, axis, u/np.where(degenerate, 1.0, norm))
+    angle = np.linspace(0, 1, npts)[None, :]*omega
+    xyz = np.cos(angle)[:, :, None]*p0[:, None, :] + np.sin(angle)[:, :, None]*u[:, None, :]
+    xyz /= np.linalg.norm(xyz, axis=2, keepdims=True)
+    lon = np.degrees(np.arctan2(xyz[:, :, 1], xyz[:, :, 0]))
+    lat = np.degrees(np.arcsin(np.clip(xyz[:, :, 2], -1.0, 1.0)))
+    # Longitude is undefined at a pole; keep the meridian of the neighbouring point
+    if npts > 1:
+        neighbour = np.concatenate((lon[:, 1:2], lon[:, :-1]), axis=1)
+        lon = np.where(np.abs(xyz[:, :, 2]) > 1 - 1e-12, neighbour, lon)
+    return np.stack((lon, lat), axis=2)
+
+
+def split_antimeridian(paths):
+    """ Split routes where they cross the antimeridian, adding the crossing point to both sides, and where
+    they pass over a pole, ending and starting the pieces at the pole. Returns a list of (M, 2) segments.
+
+    :param paths: Routes as returned by great_circle_points, shape (N, npts, 2)
+    :type paths: numpy.ndarray
+    """
+    steps = np.abs(np.diff(paths[:, :, 0], axis=1))
+    # Over a pole the longitude flips by exactly 180 degrees onto the opposite meridian
+    poles = np.abs(steps - 180) < 1e-6
+    jumps = (steps > 180) | poles
+    crossing = jumps.any(axis=1)
+    # Routes that stay on one side need no work
+    segments = list(paths[~crossing])
+    for path, jump, pole in zip(paths[crossing], jumps[crossing], poles[crossing]):
+        start = 0
+        path = path.copy()
+        for i in np.nonzero(jump)[0]:
+            (lon0, lat0), (lon1, lat1) = path[i], path[i+1]
+            if pole[i]:
+                # Break at the pole on the meridian of each side
+                lat = 90.0 if lat0 + lat1 > 0 else -90.0
+                end, path[i] = (lon0, lat), (lon1, lat)
+            else:
+                edge = 180.0 if lon0 > 0 else -180.0
+                # Unwrap the far point and interpolate latitude at the edge
+                lon1u = lon1 + 360.0 if edge > 0 else lon1 - 360.0
+                lat = lat0 + (lat1 - lat0)*(edge - lon0)/(lon1u - lon0)
+                end, path[i] = (edge, lat), (-edge, lat)
+            if (lon0, lat0) == end:
+                segments.append(np.vstack((path[start:i], [end])))
+            else:
+                segments.append(np.vstack((path[start:i], [(lon0, lat0), end])))
+            start = i
+        segments.append(path[start:])
+    return segments
+
+
+def route_segments(origins, destinations, npts=64):
+    """ Great circle route segments ready for a LineCollection
+
+    :param origins: Route start points (lon, lat), shape (N, 2)
+    :type origins: array
+    :param destinations: Route end points (lon, lat), shape (N, 2)
+    :type destinations: array
+    :param npts: Points per route
+    :type npts: int
+    """
+    return split_antimeridian(great_circle_points(origins, destinations, npts))
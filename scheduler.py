@@ -0,0 +1,257 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Refresh scheduler for fetched data sources
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, time, json, signal, random, logging, threading, subprocess
+import metrics
+
+
+# Default sources (command, target, ttl) used when not overridden in configuration
+DEFAULT_SOURCES = {
+    'satellite': {'command': './get_satellite.mac.sh', 'target': 'data/wx.png', 'ttl': 3600},
+    'tropical': {'command': './get_tropical.mac.sh', 'target': 'json/hurricane.json', 'ttl': 1800},
+    'ships': {'command': './get_ships.mac.sh', 'target': 'json/ships.json', 'ttl': 300}
+}
+
+
+class Source(object):
+    """ Fetched data source with refresh policy
+
+    :param name: Source name
+    :type name: str
+    :param command: Shell command that fetches the source
+    :type command: str
+    :param target: File written by the command
+    :type target: str
+    :param ttl: Seconds a successful fetch stays fresh
+    :type ttl: float
+    :param backoff: Initial retry delay in seconds after a failure
+    :type backoff: float
+    :param max_backoff: Maximum retry delay in seconds
+    :type max_backoff: float
+    :param jitter: Random fraction (+/-) applied to every delay
+    :type jitter: float
+    :param timeout: Seconds before the command is killed
+    :type timeout: float
+    """
+    def __init__(self, name, command, target, ttl=3600, backoff=60, max_backoff=3600, jitter=0.1, timeout=120):
+        """ Create data source """
+        self.name = name
+        self.command = command
+        self.target = target
+        self.ttl = ttl
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.timeout = timeout
+
+    def delay(self, failures):
+        """ Delay before the next attempt given consecutive failures (0 after success)
+
+        :param failures: Number of consecutive failures
+        :type failures: int
+        """
+        if failures == 0:
+            delay = self.ttl
+        else:
+            delay = min(self.max_backoff, self.backoff * 2 ** (failures - 1))
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+class Scheduler(object):
+    """ Owns all data sources and decides when each is refreshed
+
+    :param sources: Data sources
+    :type sources: list
+    :param state_file: JSON file persisting last success/attempt per source
+    :type state_file: str
+    :param concurrency: Maximum number of fetches running at once
+    :type concurrency: int
+    """
+    def __init__(self, sources=None, state_file=None, concurrency=2):
+        """ Create scheduler """
+        self.sources = dict((s.name, s) for s in (sources or []))
+        self.state_file = state_file
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.RLock()
+        self._running = {}
+        self._state = {}
+        # Load persisted state
+        if state_file is not None and os.path.exists(state_file):
+            try:
+                with open(state_file) as f:
+                    self._state = json.load(f)
+            except:
+                logging.warning('Could not load scheduler state from {}'.format(state_file))
+
+    @classmethod
+    def from_config(cls, cfg):
+        """ Create scheduler from the "config" section of the configuration file
+
+        Legacy sat_script, tropical_script and ship_script keys override the default commands.
+
+        :param cfg: Configuration
+        :type cfg: dict
+        """
+        sources = dict((name, dict(params)) for name, params in DEFAULT_SOURCES.items())
+        legacy = {'sat_script': 'satellite', 'tropical_script': 'tropical', 'ship_script': 'ships'}
+        for key, name in legacy.items():
+            if key in cfg:
+                sources[name]['command'] = cfg[key]
+        for name, params in (cfg['sources'] if 'sources' in cfg else {}).items():
+            sources.setdefault(name, {}).update(params)
+        return cls([Source(name, **params) for name, params in sources.items()],
+                   state_file=cfg['scheduler_state'] if 'scheduler_state' in cfg else 'json/scheduler_state.json',
+                   concurrency=cfg['fetch_concurrency'] if 'fetch_concurrency' in cfg else 2)
+
+    def state(self, name):
+        """ Persisted state of a source (last_success, last_attempt, failures, next_attempt) """
+        with self._lock:
+            return dict(self._state.get(name, {}))
+
+    def last_success(self, name):
+        """ Time of the freshest available artifact: last successful fetch or target modification time """
+        source = self.sources[name]
+        last = self.state(name).get('last_success', 0)
+        if os.path.exists(source.target):
+            last = max(last, os.path.getmtime(source.target))
+        return last
+
+    def artifact(self, name):
+        """ Path of the freshest available artifact for a source, or None if never fetched """
+        target = self.sources[name].target
+        return target if os.path.exists(target) else None
+
+    def age(self, name, now=None):
+        """ Seconds since the freshest available artifact was fetched """
+        last = self.last_success(name)
+        return None if last == 0 else (now or time.time()) - last
+
+    def due(self, name, now=None):
+        """ Whether a source should be fetched now """
+        now = now or time.time()
+        state = self.state(name)
+        if state.get('failures', 0) > 0:
+            return now >= state.get('next_attempt', 0)
+        # Externally updated targets (e.g. from cron) count as fresh
+        return now >= max(state.get('next_attempt', 0), self.last_success(name) + self.sources[name].ttl)
+
+    def refresh(self, names=None, wait=True, timeout=None):
+        """ Start fetches for due sources, at most `concurrency` at a time. Returns names started.
+
+        :param names: Sources to consider (default all)
+        :type names: list
+        :param wait: Block until started fetches finish
+        :type wait: boolean
+        :param timeout: Maximum seconds to wait
+        :type timeout: float
+        """
+        started = []
+        now = time.time()
+        for name in (names or sorted(self.sources)):
+            # Check and claim the source at once so layers sharing an input start a single fetch
+            with self._lock:
+                if name in self._running or not self.due(name, now):
+                    continue
+                thread = threading.Thread(target=self._fetch, args=(self.sources[name],))
+                thread.daemon = True
+                self._running[name] = thread
+            thread.start()
+            started.append(name)
+        if wait:
+            deadline = None if timeout is None else time.time() + timeout
+            for name in started:
+                thread = self._running.get(name)
+                if thread is not None:
+                    thread.join(None if deadline is None else max(0, deadline - time.time()))
+        return started
+
+    def _fetch(self, source):
+        """ Run a source's fetch command and record the outcome """
+        with self._slots:
+            attempt = time.time()
+            ok = False
+            out = b''
+            # Always record the attempt so the source is released for later refreshes
+            try:
+                # Own process group, so a timeout kills the shell and the fetcher it started
+                proc = subprocess.Popen(source.command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                        start_new_session=True)
+                try:
+                    out = proc.communicate(timeout=source.timeout)[0]
+                except subprocess.TimeoutExpired:
+                    logging.warning('Fetch of {} timed out after {}s'.format(source.name, source.timeout))
+                    self._kill(proc)
+                ok = proc.returncode == 0 and os.path.exists(source.target) and os.path.getmtime(source.target) >= attempt - 1
+                metrics.record_fetch(source.name, self._result(source, out, attempt, ok))
+            except Exception as e:
+                logging.warning('Fetch of {} failed: {}'.format(source.name, e))
+            finally:
+                self._record(source, attempt, ok)
+
+    def _kill(self, proc):
+        """ Kill a fetch command's process group and reap it without waiting on pipes held by strays """
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            proc.kill()
+        try:
+            proc.communicate(timeout=5)
+        except subprocess.TimeoutExpired:
+            for pipe in (proc.stdout, proc.stderr):
+                pipe.close()
+            proc.wait()
+
+    def _result(self, source, out, attempt, ok):
+        """ Fetch result printed by the command (last line of JSON output), or one derived from the attempt """
+        result = {}
+        lines = out.decode('utf-8', 'replace').strip().splitlines()
+        try:
+            result = json.loads(lines[-1]) if lines else {}
+        except ValueError:
+            pass
+        if not isinstance(result, dict):
+            result = {}
+        if result.get('error'):
+            logging.warning('Fetch of {}: {}'.format(source.name, result.get('msg')))
+        result['error'] = result.get('error') or not ok
+        result.setdefault('seconds', time.time() - attempt)
+        if ok and 'bytes' not in result:
+            try:
+                result['bytes'] = os.path.getsize(source.target)
+            except OSError:
+                pass
+        return result
+
+    def _record(self, source, attempt, ok):
+        """ Update and persist source state after an attempt """
+        with self._lock:
+            state = self._state.setdefault(source.name, {})
+            state['last_attempt'] = attempt
+            if ok:
+                state['last_success'] = time.time()
+                state['failures'] = 0
+            else:
+                state['failures'] = state.get('failures', 0) + 1
+                logging.warning('Fetch of {} failed ({} consecutive)'.format(source.name, state['failures']))
+            state['next_attempt'] = attempt + source.delay(state['failures'])
+            self._running.pop(source.name, None)
+            self._save()
+
+    def _save(self):
+        """ Persist state (caller holds lock) """
+        if self.state_file is None:
+            return
+        tmp = self.state_file + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(self._state, f)
+            os.rename(tmp, self.state_file)
+        except (IOError, OSError):
+            logging.warning('Could not save scheduler state to {}'.format(self.state_file))
@@ -0,0 +1,227 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Local HTTP service for the latest wallpaper frame
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, io, json, time, hashlib, logging, threading
+from PIL import Image
+import metrics
+try:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+
+# Variants encoded for every frame: name -> (scale, PIL format, content type, save options)
+VARIANTS = {
+    'png': (1.0, 'PNG', 'image/png', {}),
+    'jpeg': (1.0, 'JPEG', 'image/jpeg', {'quality': 85}),
+    'half.png': (0.5, 'PNG', 'image/png', {}),
+    'half.jpeg': (0.5, 'JPEG', 'image/jpeg', {'quality': 85}),
+    'quarter.jpeg': (0.25, 'JPEG', 'image/jpeg', {'quality': 80}),
+    'webp': (1.0, 'WEBP', 'image/webp', {'quality': 85})
+}
+
+
+class FrameStore(object):
+    """ Latest frame and its encoded variants, with notification of new frames
+
+    :param variants: Variant names to encode (default all in VARIANTS)
+    :type variants: list
+    """
+    def __init__(self, variants=None):
+        """ Create frame store """
+        self.variants = [v for v in (variants or sorted(VARIANTS)) if v in VARIANTS]
+        self.version = None
+        self.updated = None
+        self._encoded = {}
+        self._changed = threading.Condition()
+
+    def publish(self, image, png=None):
+        """ Encode and publish a new frame; identical frames are ignored
+
+        :param image: Frame
+        :type image: PIL.Image
+        :param png: Already encoded full size PNG bytes (saves re-encoding)
+        :type png: bytes
+        """
+        encoded = {}
+        for name in self.variants:
+            scale, fmt, ctype, opts = VARIANTS[name]
+            if name == 'png' and png is not None:
+                data = png
+            else:
+                img = image if scale == 1.0 else image.resize((int(image.size[0]*scale), int(image.size[1]*scale)), Image.LANCZOS)
+                if fmt == 'JPEG':
+                    img = img.convert('RGB')
+                buf = io.BytesIO()
+                try:
+                    img.save(buf, fmt, **opts)
+                except (KeyError, IOError, OSError):
+                    # Encoder not available in this PIL build
+                    continue
+                data = buf.getvalue()
+            encoded[name] = ('"{}"'.format(hashlib.sha1(data).hexdigest()), ctype, data)
+        if not encoded:
+            logging.warning('No frame variant could be encoded ({}); frame not published'.format(', '.join(self.variants)))
+            return False
+        # Frame version is the full size PNG (or first variant) ETag
+        version = (encoded.get('png') or next(iter(encoded.values())))[0].strip('"')
+        with self._changed:
+            if version == self.version:
+                return False
+            self._encoded = encoded
+            self.version = version
+            self.updated = time.time()
+            self._changed.notify_all()
+        return True
+
+    def publish_file(self, path):
+        """ Publish frame from an image file """
+        with open(path, 'rb') as f:
+            data = f.read()
+        return self.publish(Image.open(io.BytesIO(data)), png=data if data[:8] == b'\x89PNG\r\n\x1a\n' else None)
+
+    def get(self, name):
+        """ (etag, content type, bytes) of a variant or None """
+        return self._encoded.get(name)
+
+    def wait(self, version, timeout):
+        """ Block until the frame version differs from version or timeout; returns current version """
+        with self._changed:
+            if self.version == version:
+                self._changed.wait(timeout)
+            return self.version
+
+    def info(self):
+        """ Frame description """
+        return {'version': self.version, 'updated': self.updated,
+                'variants': dict((n, {'etag': v[0], 'type': v[1], 'bytes': len(v[2])}) for n, v in self._encoded.items())}
+
+
+class WallpaperHandler(BaseHTTPRequestHandler):
+    """ Serve frames with strong ETags, long-poll and server-sent events """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        """ Route request log through logging """
+        logging.debug(fmt % args)
+
+    def do_GET(self):
+        """ Handle GET request """
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        frames = self.server.frames
+        if url.path == '/events':
+            return self._events()
+        if url.path == '/metrics':
+            return self._send(200, {'Content-Type': 'text/plain; version=0.0.4', 'Cache-Control': 'no-store'},
+                              metrics.REGISTRY.render().encode('utf-8'))
+        if url.path in ('/wait', '/version'):
+            known = query.get('version', [None])[0]
+            if url.path == '/wait':
+                frames.wait(known, min(float(query.get('timeout', [60])[0]), 300))
+            if url.path == '/wait' and frames.version == known:
+                return self._send(304, {}, b'')
+            return self._send(200, {'Content-Type': 'application/json', 'Cache-Control': 'no-store'},
+                              json.dumps(frames.info()).encode('utf-8'))
+        name = url.path[len('/wallpaper.'):] if url.path.startswith('/wallpaper.') else ('png' if url.path in ('/', '/wallpaper') else None)
+        variant = frames.get(name) if name else None
+        if variant is None:
+            return self._send(404, {'Content-Type': 'text/plain'}, b'not found')
+        etag, ctype, data = variant
+        headers = {'ETag': etag, 'Content-Type': ctype, 'Cache-Control': 'no-cache'}
+        inm = self.headers.get('If-None-Match')
+        if inm and etag in [t.strip() for t in inm.split(',')]:
+            return self._send(304, headers, b'')
+        self._send(200, headers, data)
+
+    def _send(self, status, headers, body):
+        """ Send complete response """
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _events(self):
+        """ Server-sent events stream announcing each new frame version """
+        frames = self.server.frames
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        version = self.headers.get('Last-Event-ID')
+        try:
+            while True:
+                current = frames.wait(version, 25)
+                if current != version and current is not None:
+                    version = current
+                    self.wfile.write('id: {0}\nevent: frame\ndata: {1}\n\n'.format(version, json.dumps(frames.info())).encode('utf-8'))
+                else:
+                    # Keep-alive comment
+                    self.wfile.write(b': ping\n\n')
+                self.wfile.flush()
+        except (IOError, OSError):
+            pass
+
+
+def start(frames, port=8766, host='127.0.0.1'):
+    """ Start service in a background thread; returns the server
+
+    :param frames: Frame store
+    :type frames: FrameStore
+    :param port: Port
+    :type port: int
+    :param host: Bind address
+    :type host: str
+    """
+    server = ThreadingHTTPServer((host, port), WallpaperHandler)
+    server.daemon_threads = True
+    server.frames = frames
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    logging.info('Serving wallpaper on {}:{}'.format(host, port))
+    return server
+
+
+if __name__ == '__main__':
+    # Import command line argument parser
+    from optparse import OptionParser
+    # Parse for options
+    parser = OptionParser()
+    parser.add_option("-f", "--file", dest="file", default='wallpaper.png', help="Wallpaper file to watch")
+    parser.add_option("-p", "--port", dest="port", type="int", default=8766, help="Port")
+    parser.add_option("-i", "--interval", dest="interval", type="float", default=2.0, help="Seconds between file checks")
+    (options, args) = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    frames = FrameStore()
+    start(frames, options.port)
+    # Watch file written by set_wallpaper (e.g. from cron)
+    seen = None
+    while True:
+        try:
+            stat = os.stat(options.file)
+            if (stat.st_mtime, stat.st_size) != seen:
+                seen = (stat.st_mtime, stat.st_size)
+                if frames.publish_file(options.file):
+                    logging.info('Published frame {}'.format(frames.version))
+        except (IOError, OSError) as e:
+            logging.warning('Could not read {}: {}'.format(options.file, e))
+        time.sleep(options.interval)
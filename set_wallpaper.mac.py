@@ -7,23 +7,37 @@ Global Event Information System
 Copyright 2014 Newell Designs, David Newell.
 """
 
-if __name__ == '__main__':
-    import wmap, os
-    p = wmap.Plot(config_file='json/config.json', save_file='wallpaper.png')
-    p.create_map()
-    try:
-        p.load_image(imageFile='img/NaturalEarth_Mac13Retina.png', zorder=1, origin='upper', extent=[-180, 180, -90, 90])
-    except:
-        pass
-    p.update_satellite(imageFile='data/wx.png')
-    try:
-        p.load_image(imageFile='data/wx.png', zorder=3, origin='upper', alpha=0.35, extent=[-180, 180, -89, 89])
-    except:
-        pass
-    p.plot_daylight(zorder=2)
-    p.plot_tropical_wx('json/hurricane.json')
-    p.plot_worldtime('json/clocks.json')
-    p.plot_ships('json/ships.json')
-    p.plot_daylight_update_time()
+
+def render(p, pipe, wait=True):
+    """Render one wallpaper frame, updating retained layers in place
+
+    :param wait: Wait for due data sources before drawing (otherwise fetch in background)
+    :type wait: boolean
+    """
+    # Prepare layers concurrently, then draw them in z-order
+    failed = pipe.run(wait=wait)
+    if failed:
+        logging.warning('Layers not drawn: {}'.format(', '.join(sorted(failed))))
     p.set_wallpaper()
 
+
+if __name__ == '__main__':
+    import wmap, pipeline, time, logging
+    # Import command line argument parser
+    from optparse import OptionParser
+    # Parse for options
+    parser = OptionParser()
+    parser.add_option("-i", "--interval", dest="interval", type="float", help="Keep running and re-render every INTERVAL seconds")
+    (options, args) = parser.parse_args()
+    p = wmap.Plot(config_file='json/config.json', save_file='wallpaper.png')
+    pipe = pipeline.Pipeline.from_config(p, 'json/config.json')
+    # Serve frames to clients and rotate solar fields between frames while running persistently
+    if options.interval:
+        p.start_service()
+        p.start_incremental()
+    render(p, pipe)
+    # Persistent mode: keep the figure and refresh layers in place
+    while options.interval:
+        time.sleep(options.interval)
+        p.set_time()
+        render(p, pipe, wait=False)
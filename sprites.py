@@ -0,0 +1,138 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Pre-rasterized text label sprites
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+from __future__ import division
+
+import os, glob, json, math, hashlib, logging
+from collections import OrderedDict
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import metrics
+
+
+def rasterize(text, style, dpi, pad=3):
+    """ Rasterize styled text (including any bbox patch) to a tight RGBA sprite.
+    Returns (sprite, anchor): uint8 (height, width, 4) rows top-down, and the pixel position of
+    the text anchor (as placed by ha/va) measured from the sprite's lower left corner.
+
+    :param text: Label text
+    :type text: str
+    :param style: Text properties (color, size, family, weight, ha, va, alpha, bbox, ...)
+    :type style: dict
+    :param dpi: Output resolution
+    :type dpi: float
+    :param pad: Transparent margin in pixels
+    :type pad: int
+    """
+    fig = Figure(figsize=(1, 1), dpi=dpi, facecolor='none')
+    canvas = FigureCanvasAgg(fig)
+    txt = fig.text(0, 0, text, **style)
+    # Measure with the anchor at the figure origin
+    canvas.draw()
+    extent = txt.get_window_extent()
+    if txt.get_bbox_patch() is not None:
+        extent = Bbox.union([extent, txt.get_bbox_patch().get_window_extent()])
+    width = int(math.ceil(extent.width)) + 2*pad
+    height = int(math.ceil(extent.height)) + 2*pad
+    # Resize figure to the label and move the anchor so the label lands inside the margin
+    anchor = (pad - float(extent.x0), pad - float(extent.y0))
+    fig.set_size_inches(width/dpi, height/dpi)
+    txt.set_position((anchor[0]/width, anchor[1]/height))
+    canvas.draw()
+    sprite = np.array(canvas.buffer_rgba(), dtype=np.uint8)[:height, :width]
+    return sprite, anchor
+
+
+class SpriteCache(object):
+    """ Label sprites rasterized once per distinct (text, style, dpi), kept in a bounded LRU and on disk
+
+    :param path: Cache directory
+    :type path: str
+    :param max_entries: Sprites kept in memory
+    :type max_entries: int
+    :param max_files: Sprites kept on disk
+    :type max_files: int
+    """
+    def __init__(self, path='cache/sprites', max_entries=512, max_files=4096):
+        """ Create sprite cache """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_files = max_files
+        self._sprites = OrderedDict()
+        self._written = 0
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _key(self, text, style, dpi):
+        """ Cache key for a label (includes matplotlib version, which affects font layout) """
+        name = json.dumps([text, style, dpi, matplotlib.__version__], sort_keys=True, default=str)
+        return hashlib.sha1(name.encode('utf-8')).hexdigest()
+
+    def get(self, text, style, dpi, keep=True):
+        """ Return (sprite, anchor) for a label, rasterizing it on first use
+
+        :param text: Label text
+        :type text: str
+        :param style: Text properties
+        :type style: dict
+        :param dpi: Output resolution
+        :type dpi: float
+        :param keep: Also cache the sprite on disk; text unlikely to repeat (e.g. timestamps) stays in memory only
+        :type keep: boolean
+        """
+        key = self._key(text, style, dpi)
+        if key in self._sprites:
+            self._sprites[key] = entry = self._sprites.pop(key)
+            metrics.cache('sprites', True)
+            return entry
+        cached = os.path.join(self.path, key + '.npz')
+        entry = self._load(cached) if keep else None
+        metrics.cache('sprites', entry is not None)
+        if entry is None:
+            entry = rasterize(text, style, dpi)
+            if keep:
+                self._save(cached, entry)
+        self._sprites[key] = entry
+        # Drop least recently used sprites from memory
+        while len(self._sprites) > self.max_entries:
+            self._sprites.popitem(last=False)
+        return entry
+
+    def _load(self, cached):
+        """ Sprite read from disk, or None """
+        try:
+            with np.load(cached) as data:
+                entry = (data['sprite'], tuple(float(v) for v in data['anchor']))
+            os.utime(cached, None)
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+        return entry
+
+    def _save(self, cached, entry):
+        """ Write sprite to disk, evicting the oldest files now and then """
+        tmp = cached + '.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                np.savez(f, sprite=entry[0], anchor=np.array(entry[1]))
+            os.rename(tmp, cached)
+        except (IOError, OSError) as e:
+            logging.warning('Could not cache label sprite: {}'.format(e))
+            return
+        self._written += 1
+        if self._written % 64 == 0:
+            files = sorted((os.path.getmtime(f), f) for f in glob.glob(os.path.join(self.path, '*.npz')))
+            for mtime, stale in files[:max(len(files) - self.max_files, 0)]:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
@@ -0,0 +1,127 @@
+#!/usr/bin/python
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Normalized tropical storm model parsed from Weather Underground JSON
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, json, logging
+import numpy as np
+import metrics
+
+
+# Saffir-Simpson categories with an icon (-5 remnants ... 5 hurricane-5)
+CATEGORIES = range(-5, 6)
+# Category abbreviations used in forecast points
+CATEGORY_CODES = {'ts': 0, 'td': -1, 'ex': -3, 'in': -4, 're': -5}
+
+# Parsed models memoized by path -> (mtime, size, storms)
+_cache = {}
+
+
+def parse_category(value):
+    """ Normalize a Saffir-Simpson category, returning None when unknown
+
+    :param value: Category as int or code string
+    :type value: int or str
+    """
+    try:
+        cat = int(value)
+    except (TypeError, ValueError):
+        cat = CATEGORY_CODES.get(str(value).strip().lower()[:2])
+    return cat if cat in CATEGORIES else None
+
+
+def parse_forecast_hour(value):
+    """ Normalize a forecast time such as 12HR or 3DAY to hours, returning None when unknown
+
+    :param value: Forecast hour string
+    :type value: str
+    """
+    value = str(value).strip().upper()
+    try:
+        if value.endswith('HR'):
+            return int(value[:-2])
+        if value.endswith('DAY'):
+            return int(value[:-3])*24
+    except ValueError:
+        pass
+    return None
+
+
+class Storm(object):
+    """ Tropical storm with current position and forecast track arrays sorted by forecast hour """
+    __slots__ = ('name', 'category', 'lon', 'lat', 'fcst_hours', 'fcst_cats', 'fcst_lons', 'fcst_lats')
+
+    def __init__(self, name, category, lon, lat, fcst_hours, fcst_cats, fcst_lons, fcst_lats):
+        """ Create storm """
+        self.name = name
+        self.category = category
+        self.lon = lon
+        self.lat = lat
+        self.fcst_hours = fcst_hours
+        self.fcst_cats = fcst_cats
+        self.fcst_lons = fcst_lons
+        self.fcst_lats = fcst_lats
+
+    @classmethod
+    def from_json(cls, storm):
+        """ Parse a storm from a currenthurricane entry
+
+        :param storm: Storm entry
+        :type storm: dict
+        """
+        current = storm['Current']
+        # Forecast points keyed by hour (later duplicates replace earlier ones)
+        points = {}
+        for fcst in storm.get('forecast', []):
+            hour = parse_forecast_hour(fcst.get('ForecastHour'))
+            cat = parse_category(fcst.get('SaffirSimpsonCategory'))
+            if hour is None or cat is None:
+                continue
+            points[hour] = (cat, float(fcst['lon']), float(fcst['lat']))
+        hours = sorted(points)
+        return cls(name=storm['stormInfo']['stormName_Nice'],
+                   category=parse_category(current.get('SaffirSimpsonCategory')),
+                   lon=float(current['lon']),
+                   lat=float(current['lat']),
+                   fcst_hours=np.array(hours, dtype=np.int16),
+                   fcst_cats=np.array([points[h][0] for h in hours], dtype=np.int8),
+                   fcst_lons=np.array([points[h][1] for h in hours], dtype=np.float32),
+                   fcst_lats=np.array([points[h][2] for h in hours], dtype=np.float32))
+
+
+def parse_storms(data):
+    """ Parse currenthurricane JSON into storms; malformed storms are skipped individually
+
+    :param data: Parsed JSON
+    :type data: dict
+    """
+    storms = []
+    for storm in data.get('currenthurricane', []):
+        try:
+            storms.append(Storm.from_json(storm))
+        except (KeyError, TypeError, ValueError):
+            logging.warning('Skipping malformed tropical storm entry')
+    return tuple(storms)
+
+
+def load_storms(path):
+    """ Load storms from file, re-parsing only when the file changes
+
+    :param path: Tropical weather JSON file
+    :type path: str
+    """
+    stat = os.stat(path)
+    cached = _cache.get(path)
+    hit = cached is not None and cached[0] == stat.st_mtime and cached[1] == stat.st_size
+    metrics.cache('storms', hit)
+    if hit:
+        return cached[2]
+    with open(path) as f:
+        storms = parse_storms(json.load(f))
+    _cache[path] = (stat.st_mtime, stat.st_size, storms)
+    return storms
@@ -0,0 +1,12 @@
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Test configuration: modules live at the top of the repository
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,47 @@
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Frame archive tests
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os
+import numpy as np
+from PIL import Image
+from archive import Archive
+
+
+def _frame(i, size=(96, 64)):
+    """ Test frame: gray background with one changing block """
+    frame = np.full((size[1], size[0], 3), 40, dtype=np.uint8)
+    frame[(i*8) % size[1]:(i*8) % size[1]+8, 10:30] = (200, 30*i % 256, 90)
+    return frame
+
+
+def test_keyframes_and_deltas_round_trip(tmp_path):
+    """ Frames read back exactly, across segments and after reopening """
+    archive = Archive(str(tmp_path), keyframe_interval=4, tile=16, prune_interval=0)
+    for i in range(10):
+        archive.add(Image.fromarray(_frame(i)), ts=1000 + i)
+    segments = set(e[1] for e in archive._index)
+    assert len(segments) == 3
+    reopened = Archive(str(tmp_path), keyframe_interval=4, tile=16, prune_interval=0)
+    for i in range(10):
+        assert np.array_equal(reopened.frame_at(1000 + i + 0.5), _frame(i))
+    assert reopened.frame_at(999) is None
+    assert [ts for ts, image in reopened.export(1003, 1006)] == [1003, 1004, 1005, 1006]
+
+
+def test_add_prunes_expired_segments(tmp_path):
+    """ add() applies retention, removing segments whose frames all expired """
+    archive = Archive(str(tmp_path), keyframe_interval=4, tile=16, max_age=3600, downsample=[], prune_interval=60)
+    for i in range(8):
+        archive.add(Image.fromarray(_frame(i)), ts=1000 + i)
+    old = set(e[1] for e in archive._index)
+    archive.add(Image.fromarray(_frame(9)), ts=1000 + 2*86400)
+    assert archive.timestamps() == [1000 + 2*86400]
+    for name in old:
+        assert not os.path.exists(archive._segment_path(name))
+    assert np.array_equal(archive.frame_at(1000 + 2*86400), _frame(9))
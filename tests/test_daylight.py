@@ -0,0 +1,57 @@
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Solar field tracker tests
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import datetime, pytz
+import pytest
+
+pytest.importorskip('Pysolar')
+import daylight
+
+RESOLUTION = (540, 270)
+EXTENT = [-180, 180, -90, 90]
+
+
+def _daylight(minutes):
+    """ Daylight object some minutes after a fixed reference time """
+    return daylight.daylight(datetime.datetime(2026, 3, 10, 12, 0, tzinfo=pytz.utc) + datetime.timedelta(minutes=minutes))
+
+
+def test_rotated_field_verifies():
+    """ A field rotated a few minutes on matches a full recompute to within the interpolation error """
+    tracker = daylight.FieldTracker(tolerance=0.05)
+    tracker.field(_daylight(0), RESOLUTION, EXTENT)
+    dl = _daylight(10)
+    field = tracker.field(dl, RESOLUTION, EXTENT)
+    assert tracker.shift != 0.0
+    assert tracker.verify(dl, field)
+    # Linear interpolation across the kink at the subsolar point is off by at most half a column
+    assert tracker.error < 0.5*(field.lons[1]-field.lons[0])
+    assert tracker.layer('missing') is None
+
+
+def test_verify_rejects_wrong_field():
+    """ A field off by more than verify_tolerance drops the reference """
+    tracker = daylight.FieldTracker(verify_tolerance=0.5)
+    dl = _daylight(0)
+    field = tracker.field(dl, RESOLUTION, EXTENT)
+    wrong = daylight.SolarField(field.lons, field.lats, field.zenith + 1.0)
+    assert not tracker.verify(dl, wrong)
+    assert tracker.error == pytest.approx(1.0)
+    assert tracker._ref is None
+
+
+def test_failed_verification_recomputes():
+    """ Periodic verification failing rebases on a full recompute """
+    tracker = daylight.FieldTracker(tolerance=0.05, verify_every=1, verify_tolerance=0.0)
+    tracker.field(_daylight(0), RESOLUTION, EXTENT)
+    dl = _daylight(10)
+    field = tracker.field(dl, RESOLUTION, EXTENT)
+    assert tracker.shift == 0.0
+    full = dl.solar_field(resolution=RESOLUTION, extent=EXTENT, fast=True)
+    assert abs(field.zenith - full.zenith).max() < 1e-9
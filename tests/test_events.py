@@ -0,0 +1,58 @@
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Event feed tests
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os, json
+import events
+
+
+def _write(path, points, mtime):
+    """ Write GeoJSON point features {id: (lon, lat, mag)} with a given modification time """
+    features = [{'type': 'Feature', 'id': id, 'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                 'properties': {'mag': mag}} for id, (lon, lat, mag) in points.items()]
+    with open(path, 'w') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_feed_deltas(tmp_path):
+    """ Snapshots become add/update/expire deltas applied to the point store """
+    path = str(tmp_path / 'quakes.geojson')
+    _write(path, {'a': (10, 20, 4.5), 'b': (-30, 5, 5.0)}, 1000)
+    feed = events.EventFeed.from_config({'quakes': {'plugin': 'geojson', 'path': path, 'value_property': 'mag',
+                                                    'interval': 60, 'max_age': 3600}})
+    live = feed.update(now=1000)
+    assert sorted(live['value']) == [4.5, 5.0]
+    # Not due yet
+    _write(path, {'a': (10, 20, 6.0)}, 1010)
+    assert len(feed.update(now=1030)) == 2
+    live = feed.update(now=1060)
+    assert list(live['value']) == [6.0]
+    # Points without an event time expire max_age after their last update
+    assert len(feed.update(now=1060 + 3601)) == 0
+
+
+def test_misconfigured_sources_disabled(tmp_path):
+    """ Unknown plugins and disabled sources are skipped """
+    feed = events.EventFeed.from_config({'bad': {'plugin': 'no_such_module:Source'},
+                                         'off': {'plugin': 'earthquakes', 'enabled': False}})
+    assert feed.sources == []
+
+
+def test_point_store_grows():
+    """ The store grows past its capacity and reuses released rows """
+    class Source(events.EventSource):
+        def fetch(self):
+            return []
+    source = Source('s', max_age=100)
+    store = events.PointStore(capacity=2)
+    store.apply(source, 0, [(events.ADD, events.Event(str(i), i, 0)) for i in range(5)], now=0)
+    assert len(store) == 5 and len(store.points) >= 5
+    store.apply(source, 0, [(events.EXPIRE, events.Event('0', 0, 0))], now=0)
+    assert len(store) == 4 and len(store.live()) == 4
+    assert store.evict(now=101) == 4
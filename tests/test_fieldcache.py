@@ -0,0 +1,44 @@
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Solar field cache tests
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import os
+import numpy as np
+from fieldcache import FieldCache
+
+
+def test_buckets(tmp_path):
+    """ Entries are shared within a time bucket and keyed by their parameters """
+    cache = FieldCache(str(tmp_path), bucket=60)
+    zenith = np.arange(6, dtype=np.float16).reshape(2, 3)
+    cache.put(('zenith', (3, 2)), 600, zenith=zenith)
+    assert np.array_equal(cache.get(('zenith', (3, 2)), 659)['zenith'], zenith)
+    assert cache.get(('zenith', (3, 2)), 660) is None
+    assert cache.get(('zenith', (6, 4)), 600) is None
+
+
+def test_eviction(tmp_path):
+    """ Least recently used entries beyond max_entries are removed """
+    cache = FieldCache(str(tmp_path), bucket=60, max_entries=2)
+    for i in range(3):
+        cache.put(('alpha',), i*60, alpha=np.full((2, 2), i, dtype=np.uint8))
+        # Distinct modification times
+        for name in os.listdir(str(tmp_path)):
+            path = os.path.join(str(tmp_path), name)
+            os.utime(path, (os.path.getmtime(path) - 10, os.path.getmtime(path) - 10))
+    assert len(os.listdir(str(tmp_path))) == 2
+    assert cache.get(('alpha',), 0) is None
+    assert cache.get(('alpha',), 120)['alpha'][0, 0] == 2
+
+
+def test_disabled(tmp_path):
+    """ A bucket of 0 disables the cache """
+    cache = FieldCache(str(tmp_path / 'off'), bucket=0)
+    cache.put(('zenith',), 0, zenith=np.zeros(1))
+    assert cache.get(('zenith',), 0) is None
+    assert not os.path.exists(str(tmp_path / 'off'))
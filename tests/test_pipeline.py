@@ -0,0 +1,66 @@
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Layer pipeline tests
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import time, threading
+import pytest
+from pipeline import Layer, Pipeline
+
+
+class Scheduler(object):
+    """ Scheduler stand-in whose fetches never finish within the refresh budget """
+    def refresh(self, names, wait=True, timeout=None):
+        if wait:
+            time.sleep(timeout)
+        return names
+
+
+class Plot(object):
+    """ Plot stand-in recording prepare and draw calls """
+    def __init__(self):
+        self.scheduler = Scheduler()
+        self.drawn = []
+        self.release = threading.Event()
+
+    def create_map(self):
+        self.drawn = []
+
+    def prepare_slow(self, **kwargs):
+        self.release.wait(5)
+
+    def plot_slow(self, **kwargs):
+        self.drawn.append('slow')
+
+    def prepare_fast(self, **kwargs):
+        pass
+
+    def plot_fast(self, name, **kwargs):
+        self.drawn.append(name)
+
+
+def test_timeouts_do_not_accumulate():
+    """ Layers time out on their own deadlines, dependents are skipped, others still draw """
+    plot = Plot()
+    layers = [Layer('slow{}'.format(i), 'plot_slow', timeout=0.5, zorder=5) for i in range(3)]
+    layers += [Layer('child', 'plot_fast', {'name': 'child'}, depends=['slow0'], zorder=6),
+               Layer('input', 'plot_fast', {'name': 'input'}, inputs=['satellite'], timeout=0.5, refresh_timeout=0.2, zorder=2),
+               Layer('fast', 'plot_fast', {'name': 'fast'}, zorder=1)]
+    pipe = Pipeline(plot, layers, workers=len(layers))
+    start = time.time()
+    failed = pipe.run(wait=True)
+    plot.release.set()
+    assert time.time() - start < 1.5
+    assert failed == set(['slow0', 'slow1', 'slow2', 'child'])
+    # Stale input is used once the refresh budget is spent; layers draw in z-order
+    assert plot.drawn == ['fast', 'input']
+
+
+def test_dependency_cycle():
+    """ Cyclic dependencies are rejected """
+    with pytest.raises(Exception):
+        Pipeline(Plot(), [Layer('a', 'plot_fast', depends=['b']), Layer('b', 'plot_fast', depends=['a'])])
@@ -0,0 +1,78 @@
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Great circle route tests
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import numpy as np
+import routes
+
+
+def _xyz(points):
+    """ Unit vectors of (..., 2) lon/lat points """
+    return routes._to_xyz(np.asarray(points, dtype=float).reshape(-1, 2))
+
+
+def _assert_great_circle(path, start, end):
+    """ Path runs from start to end in equal steps along one great circle """
+    xyz = _xyz(path)
+    assert np.allclose(xyz[0], _xyz(start)[0]) and np.allclose(xyz[-1], _xyz(end)[0], atol=1e-9)
+    steps = np.arccos(np.clip(np.einsum('ij,ij->i', xyz[:-1], xyz[1:]), -1, 1))
+    assert np.allclose(steps, steps[0])
+    normal = np.cross(xyz[0], xyz[1])
+    assert np.allclose(xyz.dot(normal), 0, atol=1e-9)
+
+
+def test_great_circle_points():
+    """ Regular routes follow the great circle between their ends """
+    paths = routes.great_circle_points([(-74, 40.7), (139.7, 35.7)], [(2.35, 48.9), (-122.4, 37.8)], npts=16)
+    assert paths.shape == (2, 16, 2)
+    _assert_great_circle(paths[0], (-74, 40.7), (2.35, 48.9))
+    _assert_great_circle(paths[1], (139.7, 35.7), (-122.4, 37.8))
+
+
+def test_antipodal_points():
+    """ Antipodal ends get a defined great circle over the north pole """
+    path = routes.great_circle_points([(0, 0)], [(180, 0)], npts=5)[0]
+    _assert_great_circle(path, (0, 0), (180, 0))
+    assert np.isclose(path[2, 1], 90)
+    # Starting at a pole the route follows the prime meridian
+    path = routes.great_circle_points([(0, 90)], [(0, -90)], npts=5)[0]
+    _assert_great_circle(path, (0, 90), (0, -90))
+    assert np.allclose(path[1:-1, 0], 0)
+
+
+def test_coincident_points():
+    """ Routes to the same point stay there """
+    path = routes.great_circle_points([(10, 20)], [(10, 20)], npts=4)[0]
+    assert np.allclose(path, [(10, 20)]*4)
+
+
+def test_split_antimeridian():
+    """ A route across the antimeridian ends and restarts at the edge with the same latitude """
+    segments = routes.route_segments([(170, 0)], [(-170, 10)], npts=8)
+    assert len(segments) == 2
+    assert segments[0][-1][0] == 180 and segments[1][0][0] == -180
+    assert segments[0][-1][1] == segments[1][0][1]
+    assert all(np.abs(np.diff(s[:, 0])).max() < 180 for s in segments)
+
+
+def test_split_over_pole():
+    """ A route over the pole breaks at the pole instead of crossing the map """
+    # With and without a point sampled exactly at the pole
+    for npts in (8, 9):
+        segments = routes.route_segments([(10, 10)], [(-170, 10)], npts=npts)
+        assert len(segments) == 2
+        assert np.allclose(segments[0][:, 0], 10) and np.allclose(segments[1][:, 0], -170)
+        assert segments[0][-1][1] == 90 and segments[1][0][1] == 90
+        assert len(segments[0]) + len(segments[1]) == npts + 2 - (npts % 2)
+
+
+def test_no_split():
+    """ Routes staying on one side are returned whole """
+    paths = routes.great_circle_points([(-10, 0)], [(10, 0)], npts=8)
+    segments = routes.split_antimeridian(paths)
+    assert len(segments) == 1 and np.array_equal(segments[0], paths[0])
@@ -0,0 +1,59 @@
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Refresh scheduler tests
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import sys, time, threading
+from scheduler import Source, Scheduler
+
+
+def test_timeout_kills_fetcher_child(tmp_path):
+    """ A timed out command is killed with the fetcher it started, and the source is released """
+    # The shell starts a child holding stdout open, like the get_*.mac.sh scripts
+    command = '{} -c "import time; time.sleep(10)"; true'.format(sys.executable)
+    source = Source('slow', command, str(tmp_path / 'out'), timeout=1, jitter=0)
+    scheduler = Scheduler([source])
+    start = time.time()
+    assert scheduler.refresh(wait=True) == ['slow']
+    assert time.time() - start < 5
+    assert 'slow' not in scheduler._running
+    state = scheduler.state('slow')
+    assert state['failures'] == 1
+    assert state['next_attempt'] == state['last_attempt'] + source.backoff
+
+
+def test_successful_fetch(tmp_path):
+    """ A command writing its target counts as a success and is not due again within its ttl """
+    target = tmp_path / 'out'
+    source = Source('ok', 'echo data > {}'.format(target), str(target), ttl=60, jitter=0)
+    scheduler = Scheduler([source])
+    assert scheduler.refresh(wait=True) == ['ok']
+    assert scheduler.state('ok')['failures'] == 0
+    assert not scheduler.due('ok')
+    assert scheduler.refresh(wait=True) == []
+
+
+def test_shared_input_fetched_once(tmp_path):
+    """ Concurrent refreshes of the same source start a single fetch """
+    target = tmp_path / 'out'
+    source = Source('shared', 'sleep 0.5; echo data > {}'.format(target), str(target), jitter=0)
+    scheduler = Scheduler([source])
+    started = []
+    barrier = threading.Barrier(8)
+    def refresh():
+        barrier.wait()
+        started.extend(scheduler.refresh(['shared'], wait=False))
+    threads = [threading.Thread(target=refresh) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert started == ['shared']
+    scheduler.refresh(['shared'], wait=True)
+    while 'shared' in scheduler._running:
+        time.sleep(0.05)
+    assert scheduler.state('shared')['failures'] == 0
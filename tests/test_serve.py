@@ -0,0 +1,59 @@
+"""
+@author: David Newell
+@license: MIT
+
+Global Event Information System
+  Wallpaper service tests
+Copyright 2014 Newell Designs, David Newell.
+"""
+
+import json
+import pytest
+from PIL import Image
+try:
+    from urllib.request import urlopen, Request
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import urlopen, Request, HTTPError
+import serve
+
+
+def test_publish_versions():
+    """ Identical frames keep their version; new frames replace it """
+    frames = serve.FrameStore(['png', 'half.jpeg'])
+    assert frames.publish(Image.new('RGB', (8, 4), 'red'))
+    version = frames.version
+    assert not frames.publish(Image.new('RGB', (8, 4), 'red'))
+    assert frames.publish(Image.new('RGB', (8, 4), 'blue'))
+    assert frames.version != version
+    assert frames.get('half.jpeg')[1] == 'image/jpeg'
+
+
+def test_publish_without_encoders():
+    """ Nothing is published when no variant can be encoded """
+    serve.VARIANTS['none'] = (1.0, 'NO-SUCH-FORMAT', 'image/x-none', {})
+    try:
+        frames = serve.FrameStore(['none'])
+        assert not frames.publish(Image.new('RGB', (8, 4)))
+        assert frames.version is None
+    finally:
+        del serve.VARIANTS['none']
+
+
+def test_etags():
+    """ Frames are served with strong ETags and revalidated with 304 """
+    frames = serve.FrameStore(['png'])
+    frames.publish(Image.new('RGB', (8, 4), 'red'))
+    server = serve.start(frames, port=0)
+    try:
+        base = 'http://127.0.0.1:{}'.format(server.server_address[1])
+        resp = urlopen(base + '/wallpaper.png')
+        etag = resp.headers['ETag']
+        assert resp.read() == frames.get('png')[2]
+        with pytest.raises(HTTPError) as e:
+            urlopen(Request(base + '/wallpaper.png', headers={'If-None-Match': etag}))
+        assert e.value.code == 304
+        assert json.loads(urlopen(base + '/version').read().decode('utf-8'))['version'] == frames.version
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -15,16 +15,53 @@ from __future__ import division
 
 import matplotlib
 matplotlib.use('Agg')
+import matplotlib.colors
 
-import os, datetime, time, json, pytz, math, logging
+import os, io, datetime, time, calendar, json, pytz, math, logging, threading
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import cm
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.image import FigureImage
+from matplotlib.transforms import IdentityTransform
 from matplotlib.backends.backend_agg import FigureCanvasAgg
 import shapely.geometry as sgeom
 import cartopy.crs as ccrs
 from PIL import Image
 import daylight
+import archive
+import assets
+import overlay
+import routes
+import events
+import serve
+import fieldcache
+import sprites
+import metrics
+import scheduler
+import storms
+
+
+# --------------------------------------------------------
+#  Tropical storm icons
+# --------------------------------------------------------
+
+TROPICAL_ICON_PATH = 'ico/wx/tropical/small/'
+TROPICAL_ICONS = {
+    -5: 'remnants.png',
+    -4: 'invest.png',
+    -3: 'extratropical.png',
+    -2: 'depression.png',
+    -1: 'depression.png',
+    0: 'tropical-storm.png',
+    1: 'hurricane-1.png',
+    2: 'hurricane-2.png',
+    3: 'hurricane-3.png',
+    4: 'hurricane-4.png',
+    5: 'hurricane-5.png'
+}
+# Icon for storms whose category is missing or unrecognized
+TROPICAL_ICON_UNKNOWN = 'low.png'
 
 
 # --------------------------------------------------------
@@ -55,25 +92,18 @@ class Plot(object):
         if config_file == None:
             raise Exception('No configuration file specified!')
 
-        # Get current time, if not specified,  set to UTC now
-        if current_date == None or type(current_date) != datetime.datetime:
-            self._utc_now = datetime.datetime.utcnow()
-        else:
-            self._utc_now = current_date
-
-        # Setup date & time
-        self._utc_now_naive = self._utc_now
-        self._utc_now = self._utc_now.replace(tzinfo=pytz.utc)
-        self._local_now = datetime.datetime.now()
-
         # Daylight object
-        self._daylight = daylight.daylight(now=self._utc_now)
+        self._daylight = None
+        # Setup date & time
+        self.set_time(current_date)
 
         # Load configuration
         cfg = {}
+        eventCfg = {}
         try:
             c = json.load(open(config_file))
             cfg = c["config"]
+            eventCfg = c["events"] if "events" in c else {}
         except:
             pass
         # Set configuration variables (or defaults)
@@ -91,19 +121,211 @@ class Plot(object):
         self._extent = [self._min_lon, self._max_lon, self._min_lat, self._max_lat]
         # Set darkness parameter for daylight
         self._darkness = cfg['darkness'] if 'darkness' in cfg else 0.8
+        # Set solar field resolution (lon, lat)
+        self._daylight_resolution = tuple(cfg['daylight_resolution']) if 'daylight_resolution' in cfg else (540, 270)
         # Latitude and longitude ranges
         self._lat_range = self._max_lat - self._min_lat
         self._lon_range = self._max_lon - self._min_lon
         # Set filename variable
         self.save_file = save_file
-        # Initialize map
+        # Initialize figure and map
+        self._figure = None
         self._map = None
+        # Retained artists for each layer, updated in place between frames
+        self._artists = {}
+        # Resized icons keyed by (category, factor)
+        self._icons = {}
+        # Decoded input files keyed by path -> (mtime, data)
+        self._file_cache = {}
+        self._solar_lock = threading.Lock()
+        # Solar zenith and daylight shading shared by renders within the same time bucket
+        fieldCfg = cfg['daylight_cache'] if 'daylight_cache' in cfg else {}
+        self.field_cache = fieldcache.FieldCache(**fieldCfg)
+        # Incremental mode settings, used only by persistent processes (see start_incremental)
+        self._incremental_cfg = cfg['daylight_incremental'] if 'daylight_incremental' in cfg else {'tolerance': 0.05, 'verify_every': 288}
+        self._field_tracker = None
         # Initialize file save tracker
         self.saved = False
-        # Satellite and tropical shell scripts
-        self._sat_script = cfg['sat_script'] if 'sat_script' in cfg else './get_satellite.mac.sh'
-        self._tropical_script = cfg['tropical_script'] if 'tropical_script' in cfg else './get_tropical.mac.sh'
-        self._ship_script = cfg['ship_script'] if 'ship_script' in cfg else './get_ships.mac.sh'
+        # Refresh scheduler owning satellite, tropical and ship data sources
+        self.scheduler = scheduler.Scheduler.from_config(cfg)
+        # Decoded image store (memory-mapped uint8 arrays at output resolution)
+        self.assets = assets.AssetStore(cfg['asset_cache'] if 'asset_cache' in cfg else 'cache/assets')
+        # Pre-rasterized label sprites for update times and clocks
+        self.sprites = sprites.SpriteCache(cfg['sprite_cache'] if 'sprite_cache' in cfg else 'cache/sprites')
+        # Vector overlays keyed by file
+        self._overlays = {}
+        self._overlay_cache = cfg['overlay_cache'] if 'overlay_cache' in cfg else 'cache/overlays'
+        # Event feed sources (plugins imported only when enabled)
+        self.events = events.EventFeed.from_config(eventCfg) if eventCfg else None
+        self._event_points = None
+        # Frame store for the local wallpaper service (disabled unless configured)
+        self._serve_cfg = cfg['serve'] if 'serve' in cfg else None
+        self.frames = serve.FrameStore(self._serve_cfg.get('variants')) if self._serve_cfg is not None else None
+        # Prometheus text file written after every frame (disabled unless configured)
+        self._metrics_file = cfg['metrics_file'] if 'metrics_file' in cfg else None
+        # Archive of rendered frames (disabled unless configured)
+        self.archive = archive.Archive(**cfg['archive']) if 'archive' in cfg else None
+
+    def set_time(self, current_date=None):
+        """Set render time, invalidating per-frame state so layers can be refreshed in place
+
+        :param current_date: Current date and time
+        :type current_date: datetime
+        """
+        # Get current time, if not specified,  set to UTC now
+        if current_date == None or type(current_date) != datetime.datetime:
+            self._utc_now = datetime.datetime.utcnow()
+        else:
+            self._utc_now = current_date
+        # Setup date & time
+        self._utc_now_naive = self._utc_now
+        self._utc_now = self._utc_now.replace(tzinfo=pytz.utc)
+        self._local_now = datetime.datetime.now()
+        # Update daylight object
+        if self._daylight is None:
+            self._daylight = daylight.daylight(now=self._utc_now)
+        else:
+            self._daylight.set_time(self._utc_now)
+        # Solar zenith field shared by daylight, twilight and clocks (computed once per render)
+        self._solar_field = None
+        self._radiation = None
+        # Rendered frame no longer matches the figure
+        self.saved = False
+
+    def _retained(self, name, create, update=None):
+        """Return the retained artist for a layer, creating it on first draw and updating it in place afterwards
+
+        :param name: Artist name
+        :type name: str
+        :param create: Called with no arguments to create the artist
+        :type create: function
+        :param update: Called with the existing artist to update it in place
+        :type update: function
+        """
+        artist = self._artists.get(name)
+        if artist is None:
+            artist = self._artists[name] = create()
+        elif update is not None:
+            update(artist)
+        return artist
+
+    def _retained_pool(self, name, items, create, update):
+        """Return retained artists for a variable sized layer, one per item; surplus artists are hidden
+
+        :param name: Artist pool name
+        :type name: str
+        :param items: Data for each artist
+        :type items: list
+        :param create: Called with an item to create a new artist
+        :type create: function
+        :param update: Called with an existing artist and an item to update it in place
+        :type update: function
+        """
+        pool = self._artists.setdefault(name, [])
+        for i, item in enumerate(items):
+            if i < len(pool):
+                update(pool[i], item)
+                pool[i].set_visible(True)
+            else:
+                pool.append(create(item))
+        # Hide artists not needed this frame
+        for artist in pool[len(items):]:
+            artist.set_visible(False)
+        return pool[:len(items)]
+
+    def _cached_file(self, path, loader):
+        """Return loader(path), reloading only when the file modification time changes
+
+        :param path: Input file
+        :type path: str
+        :param loader: Called with the path to decode the file
+        :type loader: function
+        """
+        mtime = os.path.getmtime(path)
+        cached = self._file_cache.get(path)
+        hit = cached is not None and cached[0] == mtime
+        metrics.cache('files', hit)
+        if not hit:
+            cached = self._file_cache[path] = (mtime, loader(path))
+        return cached[1]
+
+    def _load_json(self, path):
+        """Parsed JSON file, cached by modification time"""
+        def load(p):
+            with open(p) as f:
+                return json.load(f)
+        return self._cached_file(path, load)
+
+    def start_incremental(self):
+        """Rotate the previous solar field in longitude between frames instead of recomputing it.
+        The reference field only lives in memory, so this pays off only when the process keeps rendering
+        (--interval); one-shot renders use the on-disk field cache instead."""
+        if self._incremental_cfg is None or self._incremental_cfg is False:
+            return None
+        self._field_tracker = daylight.FieldTracker(**self._incremental_cfg)
+        return self._field_tracker
+
+    def _field_key(self, kind, *params):
+        """Field cache key for the current solar field settings (fast backend)"""
+        return (kind, self._daylight_resolution, tuple(self._extent), 'fast') + params
+
+    def _render_ts(self):
+        """Render time as epoch seconds"""
+        return calendar.timegm(self._utc_now_naive.timetuple())
+
+    def solar_field(self):
+        """Return solar zenith field for the current render, computing it on first use"""
+        with self._solar_lock:
+            if self._solar_field is None and self._field_tracker is not None:
+                self._solar_field = self._field_tracker.field(self._daylight, self._daylight_resolution, self._extent)
+                if self._field_tracker.error is not None:
+                    metrics.gauge('geis_daylight_shift_error_degrees', self._field_tracker.error)
+            if self._solar_field is None:
+                key = self._field_key('zenith')
+                cached = self.field_cache.get(key, self._render_ts())
+                if cached is not None:
+                    self._solar_field = daylight.SolarField(cached['lons'], cached['lats'], cached['zenith'].astype(float))
+                else:
+                    self._solar_field = self._daylight.solar_field(resolution=self._daylight_resolution, extent=self._extent, fast=True)
+                    # Zenith stored as float16 (about 0.06 degree steps near the horizon)
+                    self.field_cache.put(key, self._render_ts(), lons=self._solar_field.lons, lats=self._solar_field.lats,
+                                         zenith=self._solar_field.zenith.astype(np.float16))
+        return self._solar_field
+
+    def prepare_daylight(self, **kwargs):
+        """Compute solar field and daylight shading for the current render (no drawing)"""
+        if self._radiation is None:
+            key = self._field_key('daylight', self._darkness)
+            if self._field_tracker is not None:
+                # Shading rotated along with the solar field
+                self.solar_field()
+                cached = self._field_tracker.layer(key)
+                cached = None if cached is None else {'alpha': cached}
+            else:
+                cached = self.field_cache.get(key, self._render_ts())
+            if cached is not None:
+                # Only the alpha channel carries shading; it is stored as uint8 steps of darkness/255
+                radiation = np.zeros(cached['alpha'].shape + (4,))
+                radiation[:, :, 3] = cached['alpha']*(self._darkness/255.0)
+                self._radiation = radiation
+                return self._radiation
+            # Get daylight grid
+            radiation = self._daylight.daylight_mesh(field=self.solar_field())
+            # Normalize daylight
+            radiation /= radiation.max()
+            radiation[:, :, 3] = 1 - radiation[:, :, 3]
+            # radiation = np.ma.masked_less(radiation, 0).filled(0)
+            self._radiation = np.ma.masked_greater(radiation, self._darkness).filled(self._darkness)
+            alpha = np.round(self._radiation[:, :, 3]*(255.0/self._darkness)) if self._darkness > 0 else self._radiation[:, :, 3]*0
+            if self._field_tracker is not None:
+                self._field_tracker.attach(key, alpha)
+            else:
+                self.field_cache.put(key, self._render_ts(), alpha=alpha.astype(np.uint8))
+        return self._radiation
+
+    def prepare_twilight(self, **kwargs):
+        """Compute solar field for the current render (no drawing)"""
+        return self.solar_field()
 
     def plot_daylight(self, *args, **kwargs):
         """Plot daylight radiation using Pysolar calculations on LatLon grid"""
@@ -111,14 +333,33 @@ class Plot(object):
         if self._map == None:
             raise Exception('Map not yet generated!')
         # Get daylight grid
-        radiation = self._daylight.daylight_mesh(resolution=(540, 270), extent=self._extent, fast=True)
-        # Normalize daylight
-        radiation /= radiation.max()
-        radiation[:, :, 3] = 1 - radiation[:, :, 3]
-        # radiation = np.ma.masked_less(radiation, 0).filled(0)
-        radiation = np.ma.masked_greater(radiation, self._darkness).filled(self._darkness)
+        radiation = self.prepare_daylight()
         # Plot daylight on map
-        self._map.imshow(radiation, interpolation='bicubic', extent=self._extent, transform=ccrs.PlateCarree(), *args, **kwargs)
+        self._retained('daylight',
+                       lambda: self._map.imshow(radiation, interpolation='bicubic', extent=self._extent, transform=ccrs.PlateCarree(), *args, **kwargs),
+                       lambda im: im.set_data(radiation))
+
+    def plot_twilight(self, colors=('#000000', '#000000', '#000000'), alpha=(0.08, 0.14, 0.2), *args, **kwargs):
+        """Plot civil, nautical and astronomical twilight bands from the solar zenith field
+
+        :param colors: Fill colors for civil, nautical and astronomical bands
+        :type colors: tuple
+        :param alpha: Opacity for civil, nautical and astronomical bands
+        :type alpha: tuple
+        """
+        # If no map specified, raise error
+        if self._map == None:
+            raise Exception('Map not yet generated!')
+        field = self.solar_field()
+        # Band colors with per-band opacity
+        bandColors = [matplotlib.colors.to_rgba(c, a) for c, a in zip(colors, alpha)]
+        # Contour sets cannot be updated in place, so replace the previous frame's bands
+        previous = self._artists.pop('twilight', None)
+        if previous is not None:
+            previous.remove()
+        # Contour all bands (zenith 90-96, 96-102, 102-108) in one marching squares pass over the field
+        self._artists['twilight'] = self._map.contourf(field.lons, field.lats, field.zenith, levels=[90, 96, 102, 108],
+                                                       colors=bandColors, transform=ccrs.PlateCarree(), *args, **kwargs)
 
     def plot_terminator(self, *args, **kwargs):
         """Plot terminator line on map"""
@@ -126,10 +367,11 @@ class Plot(object):
         if self._map == None:
             raise Exception('Map not yet generated!')
         # Get terminator points
-        term_points = self._daylight.terminator_position(resolution=1000)
-        # Plot points
-        for pt in term_points:
-            self._map.plot(pt[0], pt[1], transform=ccrs.PlateCarree(), *args, **kwargs)
+        term_points = np.array(self._daylight.terminator_position(resolution=1000))
+        # Plot points as a single line
+        self._retained('terminator',
+                       lambda: self._map.plot(term_points[:, 0], term_points[:, 1], transform=ccrs.PlateCarree(), *args, **kwargs)[0],
+                       lambda line: line.set_data(term_points[:, 0], term_points[:, 1]))
 
     def plot_point(self, lon=None, lat=None, *args, **kwargs):
         """Plot point on map"""
@@ -139,18 +381,25 @@ class Plot(object):
         # Send to plot_points
         self.plot_points(lons=[lon], lats=[lat], *args, **kwargs)
 
-    def plot_points(self, lons=None, lats=None, *args, **kwargs):
-        """Plot several points on map"""
+    def plot_points(self, lons=None, lats=None, layer=None, *args, **kwargs):
+        """Plot several points on map
+
+        :param layer: Name of retained artist to update in place on later frames
+        :type layer: str
+        """
         # If no map specified, raise error
         if self._map == None:
             raise Exception('Map not yet generated!')
         # Check for lons and lats
-        if lons == None or lats == None:
+        if lons is None or lats is None:
             return False
         # Plot specified point on map
-        self._map.scatter(lons, lats, transform=ccrs.PlateCarree(), *args, **kwargs)
+        create = lambda: self._map.scatter(lons, lats, transform=ccrs.PlateCarree(), *args, **kwargs)
+        if layer is None:
+            return create()
+        return self._retained(layer, create, lambda sc: sc.set_offsets(np.column_stack((lons, lats))))
 
-    def plot_great_circle(self, start, end, *args, **kwargs):
+    def plot_great_circle(self, start, end, **kwargs):
         """Draw a great circle path on map
 
         :param start: Starting point (lon, lat)
@@ -158,14 +407,115 @@ class Plot(object):
         :param end: Ending point (lon, lat)
         :type end: tuple
         """
+        # Plot great circle as a single route
+        return self.plot_routes([start], [end], **kwargs)
+
+    def plot_routes(self, origins, destinations, npts=64, layer=None, **kwargs):
+        """Draw great circle routes for many origin/destination pairs as a single line collection
+
+        :param origins: Route start points (lon, lat)
+        :type origins: list
+        :param destinations: Route end points (lon, lat)
+        :type destinations: list
+        :param npts: Points per route
+        :type npts: int
+        :param layer: Name of retained artist to update in place on later frames
+        :type layer: str
+        """
         # If no map specified, raise error
         if self._map == None:
             raise Exception('Map not yet generated!')
-        # Plot great circle
-        self._map.plot(start, end, transform=ccrs.Geodetic(), *args, **kwargs)
+        # Interpolate all routes at once and split them at the antimeridian
+        segments = routes.route_segments(origins, destinations, npts)
+        create = lambda: self._map.add_collection(LineCollection(segments, **kwargs))
+        if layer is None:
+            return create()
+        return self._retained(layer, create, lambda lc: lc.set_segments(segments))
+
+    def _update_text(self, txt, text, x, y, color=None):
+        """Update retained text artist in place"""
+        txt.set_text(text)
+        txt.set_position((x, y))
+        if color is not None:
+            txt.set_color(color)
+
+    def _update_figimage(self, im, ico):
+        """Update retained figure image in place from (image, xo, yo)"""
+        im.set_data(ico[0])
+        im.ox = ico[1]
+        im.oy = ico[2]
+
+    def prepare_overlay(self, overlayFile=None, tolerance=1.0, **kwargs):
+        """Simplify overlay features for the output resolution and cull them to the map extent (no drawing)
+
+        :param overlayFile: GeoJSON file or shapefile
+        :type overlayFile: str
+        :param tolerance: Simplification tolerance in output pixels
+        :type tolerance: float
+        """
+        if overlayFile == None:
+            raise Exception('Overlay filename not specified.')
+        if overlayFile not in self._overlays:
+            self._overlays[overlayFile] = overlay.VectorOverlay(overlayFile, self._overlay_cache)
+        # Degrees covered by one output pixel
+        degPerPixel = self._lon_range/(self._plot_size[0]*self._dpi)
+        return self._overlays[overlayFile].query(self._extent, tolerance*degPerPixel)
 
-    def add_text_to_map(self, text=None, lon=None, lat=None, *args, **kwargs):
-        """Add text to map at specified geographical location"""
+    def plot_overlay(self, overlayFile=None, style=None, styleBy=None, styles=None, tolerance=1.0):
+        """Plot vector overlay features as one line and one polygon collection per style
+
+        :param overlayFile: GeoJSON file or shapefile
+        :type overlayFile: str
+        :param style: Default style (edgecolor, facecolor, linewidth, alpha, zorder)
+        :type style: dict
+        :param styleBy: Feature property selecting a style from styles
+        :type styleBy: str
+        :param styles: Styles keyed by styleBy property value
+        :type styles: dict
+        :param tolerance: Simplification tolerance in output pixels
+        :type tolerance: float
+        """
+        # If no map specified, raise error
+        if self._map == None:
+            raise Exception('Map not yet generated!')
+        name = 'overlay:' + overlayFile
+        signature = (os.path.getmtime(overlayFile), json.dumps([style, styleBy, styles, tolerance], sort_keys=True))
+        # Static overlays are kept as drawn until the file or style changes
+        previous = self._artists.get(name)
+        if previous is not None and previous[0] == signature:
+            return
+        features = self.prepare_overlay(overlayFile, tolerance)
+        # Group line and polygon paths by style
+        groups = {}
+        for geom, props in features:
+            key = str(props.get(styleBy)) if styleBy else None
+            lines, polygons = overlay.geometry_paths(geom)
+            group = groups.setdefault(key, ([], []))
+            group[0].extend(lines)
+            group[1].extend(polygons)
+        # Replace previous collections
+        if previous is not None:
+            for collection in previous[1]:
+                collection.remove()
+        collections = []
+        for key, (lines, polygons) in groups.items():
+            fmt = {'edgecolor': '#333333', 'facecolor': 'none', 'linewidth': 0.5, 'alpha': 1.0, 'zorder': 4}
+            fmt.update(style or {})
+            fmt.update((styles or {}).get(key, {}))
+            if lines:
+                collections.append(self._map.add_collection(LineCollection(
+                    lines, colors=fmt['edgecolor'], linewidths=fmt['linewidth'], alpha=fmt['alpha'], zorder=fmt['zorder'])))
+            if polygons:
+                collections.append(self._map.add_collection(PathCollection(
+                    polygons, edgecolors=fmt['edgecolor'], facecolors=fmt['facecolor'], linewidths=fmt['linewidth'], alpha=fmt['alpha'], zorder=fmt['zorder'])))
+        self._artists[name] = (signature, collections)
+
+    def add_text_to_map(self, text=None, lon=None, lat=None, layer=None, *args, **kwargs):
+        """Add text to map at specified geographical location
+
+        :param layer: Name of retained artist to update in place on later frames
+        :type layer: str
+        """
         # If no map specified, raise error
         if self._map == None:
             raise Exception('Map not yet generated!')
@@ -173,10 +523,17 @@ class Plot(object):
         if lon == None or lat == None or text == None:
             return False
         # Add text to map
-        self._map.text(lon, lat, text, transform=ccrs.PlateCarree(), *args, **kwargs)
+        create = lambda: self._map.text(lon, lat, text, transform=ccrs.PlateCarree(), *args, **kwargs)
+        if layer is None:
+            return create()
+        return self._retained(layer, create, lambda txt: self._update_text(txt, text, lon, lat, kwargs.get('color')))
 
-    def add_text_to_fig(self, text=None, x=None, y=None, *args, **kwargs):
-        """Add text to map at specified figure relative location (0-1)"""
+    def add_text_to_fig(self, text=None, x=None, y=None, layer=None, *args, **kwargs):
+        """Add text to map at specified figure relative location (0-1)
+
+        :param layer: Name of retained artist to update in place on later frames
+        :type layer: str
+        """
         # If no map specified, raise error
         if self._map == None:
             raise Exception('Map not yet generated!')
@@ -184,7 +541,66 @@ class Plot(object):
         if x == None or y == None or text == None:
             return False
         # Add text to figure
-        self._figure.text(x, y, text, *args, **kwargs)
+        create = lambda: self._figure.text(x, y, text, *args, **kwargs)
+        if layer is None:
+            return create()
+        return self._retained(layer, create, lambda txt: self._update_text(txt, text, x, y, kwargs.get('color')))
+
+    def _add_label(self, text, px, py, layer, style, on_map=False, keep=True):
+        """Place a cached label sprite with its text anchor at figure pixel (px, py)
+
+        :param on_map: Draw among the map's artists (stacked by zorder as map text is) rather than the figure's
+        :type on_map: boolean
+        :param keep: Also cache the sprite on disk (off for text that changes every frame)
+        :type keep: boolean
+        """
+        style = dict(style)
+        # Same default stacking as matplotlib text
+        zorder = style.pop('zorder', 3)
+        sprite, anchor = self.sprites.get(text, style, self._dpi, keep)
+        ico = (sprite, int(round(px - anchor[0])), int(round(py - anchor[1])))
+        def create():
+            if not on_map:
+                return self._figure.figimage(ico[0], xo=ico[1], yo=ico[2], zorder=zorder, origin='upper')
+            im = FigureImage(self._figure, offsetx=ico[1], offsety=ico[2], origin='upper', zorder=zorder)
+            im.set_data(ico[0])
+            # Keep pixel placement (the map would otherwise apply its data transform)
+            im.set_transform(IdentityTransform())
+            self._map.add_artist(im)
+            im.set_clip_on(False)
+            return im
+        return self._retained(layer, create, lambda im: self._update_figimage(im, ico))
+
+    def add_label_to_map(self, text, lon, lat, layer, **kwargs):
+        """Add label sprite to map at specified geographical location, text styled as for add_text_to_map
+
+        :param layer: Name of retained artist to update in place on later frames
+        :type layer: str
+        """
+        # If no map specified, raise error
+        if self._map == None:
+            raise Exception('Map not yet generated!')
+        width, height = self._image_size()
+        return self._add_label(text, (lon-self._min_lon)/self._lon_range*width, (lat-self._min_lat)/self._lat_range*height, layer, kwargs, on_map=True)
+
+    def add_label_to_fig(self, text, x, y, layer, keep=True, **kwargs):
+        """Add label sprite at specified figure relative location (0-1), text styled as for add_text_to_fig
+
+        :param layer: Name of retained artist to update in place on later frames
+        :type layer: str
+        :param keep: Also cache the sprite on disk (False for text such as timestamps)
+        :type keep: boolean
+        """
+        # If no map specified, raise error
+        if self._figure == None:
+            raise Exception('Map not yet generated!')
+        width, height = self._image_size()
+        return self._add_label(text, x*width, y*height, layer, kwargs, keep=keep)
+
+    def prepare_worldtime(self, clockFile=None, **kwargs):
+        """Load clock definitions and solar field for the current render (no drawing)"""
+        self.solar_field()
+        return self._load_json(clockFile)
 
     def plot_worldtime(self, clockFile=None):
         """Plot world time at desired location specified in clock definition json file"""
@@ -197,101 +613,127 @@ class Plot(object):
         n = 0
         # Load clock definition json file
         if not clockFile == None:
-            # Plot background
-            self._map.fill([-180, -180, 180, 180], [-90, -64.25, -64.25, -90], transform=ccrs.PlateCarree(), alpha=0.5, color='white', zorder=2)
-            self._map.fill([-180, -180, 180, 180], [-90, -64.25, -64.25, -90], transform=ccrs.PlateCarree(), alpha=0.4, color='wheat', zorder=3)
-            with open(clockFile) as cf:
-                # Parse JSON
-                j = json.load(cf)
-                # Text parameters
-                txtparams = j['formatting']['text']
-                # Point parameters
-                ptparams = j['formatting']['point']
-                # Get colors
-                colors = j['formatting']['colors']
-                # Get display latitude & offset
-                dlat = j['formatting']['display']['lat']
-                doffset = j['formatting']['display']['offset']
-                # Sort locations
-                clocks = j['clocks']
-                sortCities = tuple(sorted(j['clocks'].items(), key=lambda k: k[1]['lon']))
-                cityDirection = [False for i in range(len(sortCities))]
-                # Add each city to map
-                for i in range(len(sortCities)):
-                    # Get city
-                    city = sortCities[i][0]
-                    # Convert to local time
-                    localTime = self._utc_now.astimezone(pytz.timezone(clocks[city]['tz']))
-                    # Get sun altitude at location
-                    sunAlt = self._daylight.sun_alt_at_point(clocks[city]['lon'], clocks[city]['lat'], True)
-                    # Color according to sun altitude
-                    if sunAlt < -8.:
-                        txtparams["color"] = '#09041c'
-                    elif -8. <= sunAlt < -2.:
-                        txtparams["color"] = '#221c32'
-                    elif -2. <= sunAlt < 5.:
-                        # txtparams["color"] = '#4071d7'
-                        txtparams["color"] = '#1a0662'
-                    else:
-                        # txtparams["color"] = '#f28705'
-                        txtparams["color"] = '#125700'
-                    # Display longitude
-                    dlon = clocks[city]['lon']
-                    # Offset if within 5 degrees of previous
-                    direction = False
-                    if i > 0 and dlon-clocks[sortCities[i-1][0]]['lon'] < doffset:
-                        direction = not cityDirection[i-1]
-                    # Update direction
-                    cityDirection[i] = direction
-                    # Direction true means adjust text up
-                    if not direction:
-                        # City name & clock lat below reference point
-                        cityPos = dlat - 4
-                        clockPos = dlat - 6.9
-                    else:
-                        # City name & clock lat above reference point
-                        cityPos = dlat + 4.8
-                        clockPos = dlat + 2
-                    # Add city and reference point to map
-                    self.plot_point(lon=dlon, lat=clocks[city]['lat'], c=colors[n], **ptparams)
-                    self.plot_point(lon=dlon, lat=dlat, c=colors[n], **ptparams)
-                    # Add location and time text to map above reference point
-                    self.add_text_to_map(lon=dlon, lat=cityPos, text=city, **txtparams)
-                    self.add_text_to_map(lon=dlon, lat=clockPos, text=localTime.strftime(fmt), **txtparams)
-                    # Update counter
-                    n += 1
-                    # Cycle through colors
-                    if n >= len(colors):
-                        n = 0
+            # Plot background (static, drawn once)
+            self._retained('worldtime:background', lambda: (
+                self._map.fill([-180, -180, 180, 180], [-90, -64.25, -64.25, -90], transform=ccrs.PlateCarree(), alpha=0.5, color='white', zorder=2),
+                self._map.fill([-180, -180, 180, 180], [-90, -64.25, -64.25, -90], transform=ccrs.PlateCarree(), alpha=0.4, color='wheat', zorder=3)))
+            # Parse JSON
+            j = self.prepare_worldtime(clockFile)
+            # Text parameters
+            txtparams = dict(j['formatting']['text'])
+            # Point parameters
+            ptparams = j['formatting']['point']
+            # Get colors
+            colors = j['formatting']['colors']
+            # Get display latitude & offset
+            dlat = j['formatting']['display']['lat']
+            doffset = j['formatting']['display']['offset']
+            # Sort locations
+            clocks = j['clocks']
+            sortCities = tuple(sorted(j['clocks'].items(), key=lambda k: k[1]['lon']))
+            cityDirection = [False for i in range(len(sortCities))]
+            # City and reference point positions and colors
+            ptLons = []
+            ptLats = []
+            ptColors = []
+            # Label artists drawn this frame
+            labels = set()
+            # Sample sun altitude at every city from the shared solar field
+            sunAlts = 90.0 - self.solar_field().sample([c[1]['lon'] for c in sortCities], [c[1]['lat'] for c in sortCities])
+            # Add each city to map
+            for i in range(len(sortCities)):
+                # Get city
+                city = sortCities[i][0]
+                # Convert to local time
+                localTime = self._utc_now.astimezone(pytz.timezone(clocks[city]['tz']))
+                # Get sun altitude at location
+                sunAlt = sunAlts[i]
+                # Color according to sun altitude
+                if sunAlt < -8.:
+                    txtparams["color"] = '#09041c'
+                elif -8. <= sunAlt < -2.:
+                    txtparams["color"] = '#221c32'
+                elif -2. <= sunAlt < 5.:
+                    # txtparams["color"] = '#4071d7'
+                    txtparams["color"] = '#1a0662'
+                else:
+                    # txtparams["color"] = '#f28705'
+                    txtparams["color"] = '#125700'
+                # Display longitude
+                dlon = clocks[city]['lon']
+                # Offset if within 5 degrees of previous
+                direction = False
+                if i > 0 and dlon-clocks[sortCities[i-1][0]]['lon'] < doffset:
+                    direction = not cityDirection[i-1]
+                # Update direction
+                cityDirection[i] = direction
+                # Direction true means adjust text up
+                if not direction:
+                    # City name & clock lat below reference point
+                    cityPos = dlat - 4
+                    clockPos = dlat - 6.9
+                else:
+                    # City name & clock lat above reference point
+                    cityPos = dlat + 4.8
+                    clockPos = dlat + 2
+                # Collect city and reference point
+                ptLons.extend((dlon, dlon))
+                ptLats.extend((clocks[city]['lat'], dlat))
+                ptColors.extend((colors[n], colors[n]))
+                # Add location and time text to map above reference point
+                self.add_label_to_map(city, dlon, cityPos, 'worldtime:city:' + city, **txtparams)
+                self.add_label_to_map(localTime.strftime(fmt), dlon, clockPos, 'worldtime:clock:' + city, **txtparams)
+                labels.update(('worldtime:city:' + city, 'worldtime:clock:' + city))
+                # Update counter
+                n += 1
+                # Cycle through colors
+                if n >= len(colors):
+                    n = 0
+            # Remove labels of cities no longer in the clock file
+            for name in [k for k in self._artists if k.startswith(('worldtime:city:', 'worldtime:clock:')) and k not in labels]:
+                self._artists.pop(name).remove()
+            # Add all city and reference points to map
+            self.plot_points(lons=ptLons, lats=ptLats, layer='worldtime:points', c=ptColors, **ptparams)
+
+    def _tropical_icon(self, cat, factor):
+        """Return tropical storm icon for a category resized by factor, loading it once per process
+
+        :param cat: Saffir-Simpson category (None when unknown)
+        :type cat: int
+        :param factor: Resize factor
+        :type factor: float
+        """
+        key = (cat, factor)
+        if key not in self._icons:
+            iconFile = TROPICAL_ICON_PATH + TROPICAL_ICONS.get(cat, TROPICAL_ICON_UNKNOWN)
+            native = self.assets.load(iconFile)
+            self._icons[key] = self.assets.load(iconFile, (int(native.shape[1]*factor), int(native.shape[0]*factor)))
+        return self._icons[key]
+
+    def _icon_offset(self, icon, lon, lat):
+        """Figure pixel offset placing an icon centered on lon/lat"""
+        cx = (lon+self._lon_range/2)/self._lon_range*self._screen_size[0]
+        cy = (lat+self._lat_range/2)/self._lat_range*self._screen_size[1]
+        return cx-icon.shape[1]/2, cy-icon.shape[0]/2
+
+    def prepare_tropical_wx(self, tropicalFile=None, **kwargs):
+        """Parse storm model and load its icons (no drawing)"""
+        stormList = storms.load_storms(tropicalFile)
+        for storm in stormList:
+            self._tropical_icon(storm.category, 1.0)
+            for cat in set(storm.fcst_cats.tolist()):
+                self._tropical_icon(cat, 0.7)
+        return stormList
 
     def plot_tropical_wx(self, tropicalFile=None, txtX=0.968, txtY=0.015, **kwargs):
         """Plot tropical weather data from json provided by Weather Underground API"""
         # If no map specified, raise error
         if self._map == None or self._figure == None:
             raise Exception('Map not yet generated!')
-        # Tropical icon mapping
-        tropicalImgBasePath = 'ico/wx/tropical/small/'
-        tropicalFutureImgBasePath = 'ico/wx/tropical/small/'
-        tropicalImgPath = {
-            -5: 'remnants.png',
-            -4: 'invest.png',
-            -3: 'extratropical.png',
-            -2: 'depression.png',
-            -1: 'depression.png',
-            0: 'tropical-storm.png',
-            1: 'hurricane-1.png',
-            2: 'hurricane-2.png',
-            3: 'hurricane-3.png',
-            4: 'hurricane-4.png',
-            5: 'hurricane-5.png'
-        }
-        tropicalImg = {}
-        tropicalFutureImg = {}
         resizeFactor = {
                 'current': 1.0,
                 'future': 0.7
             }
-        imgSize = None
         tropicalText = {
                 'size'      : 13,
                 'ha'        : 'center',
@@ -316,99 +758,44 @@ class Plot(object):
                 'ha': 'right'
             }
         updateTextFmt.update(kwargs)
-        # Get last update time
-        lastUpdate = os.path.getmtime(tropicalFile)
-        # If more than half an hour old, try to update
-        if lastUpdate < time.time() - 1800:
-            os.system(self._tropical_script)
-        # Update last update time
-        lastUpdate = os.path.getmtime(tropicalFile)
         # Load tropical data
         if not tropicalFile == None:
             try:
-                with open(tropicalFile) as tf:
-                    # Parse JSON
-                    j = json.load(tf)
-                    # Process each storm
-                    if len(j['currenthurricane']) > 0:
-                        for storm in j['currenthurricane']:
-                            # Get storm details
-                            name = storm['stormInfo']['stormName_Nice']
-                            cat = storm['Current']['SaffirSimpsonCategory']
-                            clat = storm['Current']['lat']
-                            clon = storm['Current']['lon']
-                            # Get storm center point relative to image
-                            cx = (clon+self._lon_range/2)/self._lon_range*self._screen_size[0]
-                            cy = (clat+self._lat_range/2)/self._lat_range*self._screen_size[1]
-                            # Load icon and resize
-                            if cat not in tropicalImg:
-                                icon = Image.open(tropicalImgBasePath + tropicalImgPath[cat])
-                                tropicalImg[cat] = np.asarray(icon.resize((int(icon.size[0]*resizeFactor['current']), int(icon.size[1]*resizeFactor['current']))))
-                                if imgSize == None:
-                                    imgSize = (int(icon.size[0]*resizeFactor['current']), int(icon.size[1]*resizeFactor['current']))
-                                icon = None
-                            # Get icon size
-                            icoW = imgSize[0]
-                            icoH = imgSize[1]
-                            # Plot storm
-                            self._figure.figimage(tropicalImg[cat], xo=cx-icoW/2, yo=cy-icoH/2, zorder=9, alpha=0.8)
-                            self._figure.text(cx/self._screen_size[0], (cy-icoH-2)/self._screen_size[1], name, **tropicalText)
-                            # Set previous point
-                            prevPt = {
-                                        'cat': cat,
-                                        'xo': clon,
-                                        'yo': clat,
-                                        'lat': clat,
-                                        'lon': clon
-                                    }
-                            # Forecast points
-                            fcstPts = {}
-                            # Process forecast
-                            for fcst in storm['forecast']:
-                                # Get storm details
-                                if fcst['ForecastHour'].find('HR') > -1:
-                                    ftime = int(fcst['ForecastHour'][:-2])
-                                elif fcst['ForecastHour'].find('DAY') > -1:
-                                    ftime = int(fcst['ForecastHour'][:-3])*24
-                                else:
-                                    ftime = 0
-                                cat = fcst['SaffirSimpsonCategory']
-                                clat = fcst['lat']
-                                clon = fcst['lon']
-                                # Get storm center point relative to image
-                                cx = (clon+self._lon_range/2)/self._lon_range*self._screen_size[0]
-                                cy = (clat+self._lat_range/2)/self._lat_range*self._screen_size[1]
-                                # Load icon and resize
-                                if cat not in tropicalFutureImg:
-                                    icon = Image.open(tropicalFutureImgBasePath + tropicalImgPath[cat])
-                                    tropicalFutureImg[cat] = np.asarray(icon.resize((int(icon.size[0]*resizeFactor['future']), int(icon.size[1]*resizeFactor['future']))))
-                                    if imgSize == None:
-                                        imgSize = (int(icon.size[0]*resizeFactor['future']), int(icon.size[1]*resizeFactor['future']))
-                                    icon = None
-                                # Get icon size
-                                icoW = imgSize[0]
-                                icoH = imgSize[1]
-                                # Add to forecast points
-                                fcstPts[ftime] = {
-                                        'cat': cat,
-                                        'xo': cx-icoW/2,
-                                        'yo': cy-icoH/2,
-                                        'lat': clat,
-                                        'lon': clon
-                                    }
-                            # Plot forecasted track
-                            for i in sorted(fcstPts):
-                                # Plot storm
-                                self._figure.figimage(tropicalFutureImg[fcstPts[i]['cat']],
-                                                                 xo=fcstPts[i]['xo'], yo=fcstPts[i]['yo'],
-                                                                 zorder=8, alpha=0.4, transform=ccrs.PlateCarree())
-                                # Update previous point
-                                prevPt = fcstPts[i]
-                    # Plot update time
-                    updateText = 'Tropical Weather Updated:  {}'.format(time.strftime('%B %d, %Y  %I:%M%p', time.localtime(lastUpdate)))
-                    self.add_text_to_fig(x=txtX, y=txtY, text=updateText, **updateTextFmt)
-            except:
+                # Get last update time (fetching is handled by the refresh scheduler)
+                lastUpdate = os.path.getmtime(tropicalFile)
+                # Parsed storm model (re-parsed only when the file changes)
+                stormList = storms.load_storms(tropicalFile)
+            except (IOError, OSError, ValueError):
                 logging.warning('Error loading tropical weather data...')
+                return
+            # Current and forecast icons (image, xo, yo) and storm names (name, x, y)
+            currentIcons = []
+            futureIcons = []
+            names = []
+            for storm in stormList:
+                # Current position
+                icon = self._tropical_icon(storm.category, resizeFactor['current'])
+                xo, yo = self._icon_offset(icon, storm.lon, storm.lat)
+                currentIcons.append((icon, xo, yo))
+                names.append((storm.name, (xo+icon.shape[1]/2)/self._screen_size[0], (yo-icon.shape[0]/2-2)/self._screen_size[1]))
+                # Forecasted track
+                for cat, lon, lat in zip(storm.fcst_cats, storm.fcst_lons, storm.fcst_lats):
+                    icon = self._tropical_icon(int(cat), resizeFactor['future'])
+                    xo, yo = self._icon_offset(icon, lon, lat)
+                    futureIcons.append((icon, xo, yo))
+            # Plot storms, reusing artists from previous frames
+            self._retained_pool('tropical:current', currentIcons,
+                                lambda ico: self._figure.figimage(ico[0], xo=ico[1], yo=ico[2], zorder=9, alpha=0.8),
+                                self._update_figimage)
+            self._retained_pool('tropical:names', names,
+                                lambda txt: self._figure.text(txt[1], txt[2], txt[0], **tropicalText),
+                                lambda artist, txt: self._update_text(artist, txt[0], txt[1], txt[2]))
+            self._retained_pool('tropical:forecast', futureIcons,
+                                lambda ico: self._figure.figimage(ico[0], xo=ico[1], yo=ico[2], zorder=8, alpha=0.4),
+                                self._update_figimage)
+            # Plot update time
+            updateText = 'Tropical Weather Updated:  {}'.format(time.strftime('%B %d, %Y  %I:%M%p', time.localtime(lastUpdate)))
+            self.add_label_to_fig(updateText, txtX, txtY, 'tropical:updated', keep=False, **updateTextFmt)
 
     def plot_daylight_update_time(self, x=0.032, y=0.015, *args, **kwargs):
         """Plot daylight update time"""
@@ -423,40 +810,96 @@ class Plot(object):
             }
         pltArgs.update(kwargs)
         updateText = 'Daylight Updated:  {}'.format(self._local_now.strftime('%B %d, %Y  %I:%M%p'))
-        self.add_text_to_fig(x=x, y=y, text=updateText, *args, **pltArgs)
+        self.add_label_to_fig(updateText, x, y, 'daylight:updated', keep=False, **pltArgs)
 
-    def update_satellite(self, imageFile=None):
-        """Update satellite image based on time since last update"""
+    def update_satellite(self, imageFile=None, timeout=None):
+        """Update satellite image if due according to the refresh scheduler"""
         # Raise error if figure,  map,  or filename do not exist
         if self._figure == None or self._map == None:
             raise Exception('Map not yet generated!')
         if imageFile == None:
             raise Exception('Image filename not specified.')
-        # Get last update time
-        lastUpdate = os.path.getmtime(imageFile)
-        # If more than an hour old, try to update
-        if lastUpdate < time.time() - 3600:
-            os.system(self._sat_script)
-        # Update last update time
-        lastUpdate = os.path.getmtime(imageFile)
+        # Refresh satellite source (no-op unless due)
+        self.scheduler.refresh(['satellite'], timeout=timeout)
+
+    def prepare_ships(self, shipFile=None, **kwargs):
+        """Load ship locations (no drawing)"""
+        return self._load_json(shipFile)
+
+    def prepare_events(self, **kwargs):
+        """Poll due event sources into the point store (no drawing)"""
+        if self.events is not None:
+            self._event_points = self.events.update(calendar.timegm(self._utc_now_naive.timetuple()))
+        return self._event_points
+
+    def plot_events(self, zorder=9, **kwargs):
+        """Plot all enabled event sources as one point collection and one composited icon image"""
+        # If no map specified, raise error
+        if self._figure == None or self._map == None:
+            raise Exception('Map not yet generated!')
+        if self.events is None:
+            return
+        points = self._event_points if self._event_points is not None else self.prepare_events()
+        # Per-source style lookup
+        styles = [dict({'color': '#ff4500', 'size': 20, 'scale': 10, 'alpha': 0.8}, **style) for style in self.events.styles]
+        colors = [styles[i]['color'] for i in points['source']]
+        sizes = np.array([styles[i]['size'] for i in points['source']]) + points['value']*np.array([styles[i]['scale'] for i in points['source']])
+        offsets = np.column_stack((points['lon'], points['lat']))
+        # Points of sources without an icon
+        dots = np.array([not styles[i].get('icon') for i in points['source']], dtype=bool)
+
+        def update(sc):
+            sc.set_offsets(offsets[dots])
+            sc.set_facecolor([c for c, d in zip(colors, dots) if d])
+            sc.set_sizes(sizes[dots])
+        self._retained('events:points',
+                       lambda: self._map.scatter(offsets[dots, 0], offsets[dots, 1], s=sizes[dots], c=[c for c, d in zip(colors, dots) if d],
+                                                 lw=0.25, zorder=zorder, transform=ccrs.PlateCarree(), **kwargs),
+                       update)
+        # Composite icons into one figure-sized image
+        if dots.all() and 'events:icons' not in self._artists:
+            return
+        width, height = self._image_size()
+        layer = self._artists.get('events:icons')
+        canvas = np.zeros((height, width, 4), dtype=np.uint8) if layer is None else layer.get_array()
+        canvas[:] = 0
+        for point, source in zip(points[~dots], points['source'][~dots]):
+            style = styles[source]
+            icon = self.assets.load(style['icon'])
+            xo, yo = self._icon_offset(icon, point['lon'], point['lat'])
+            self._blit(canvas, icon, int(xo), int(yo), style['alpha'])
+        self._retained('events:icons', lambda: self._figure.figimage(canvas, zorder=zorder, origin='lower'), lambda im: im.set_data(canvas))
+
+    def _blit(self, canvas, icon, xo, yo, alpha=1.0):
+        """Alpha-composite a uint8 RGBA icon onto a uint8 RGBA canvas at pixel offset (origin lower left)"""
+        h, w = icon.shape[:2]
+        x0, y0 = max(xo, 0), max(yo, 0)
+        x1, y1 = min(xo+w, canvas.shape[1]), min(yo+h, canvas.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+        # Icon rows run top-down; canvas rows bottom-up
+        src = icon[::-1][y0-yo:y1-yo, x0-xo:x1-xo].astype(np.float32)/255.0
+        if src.shape[2] == 3:
+            src = np.dstack((src, np.ones(src.shape[:2], dtype=np.float32)))
+        dst = canvas[y0:y1, x0:x1].astype(np.float32)/255.0
+        # Porter-Duff "over" with straight alpha
+        sa = src[:, :, 3:]*alpha
+        da = dst[:, :, 3:]*(1-sa)
+        outA = sa + da
+        outRGB = (src[:, :, :3]*sa + dst[:, :, :3]*da)/np.maximum(outA, 1e-6)
+        canvas[y0:y1, x0:x1] = np.round(np.dstack((outRGB, outA))*255).astype(np.uint8)
 
     def plot_ships(self, shipFile=None, txtX=0.5, txtY=0.015, *args, **kwargs):
-        """Update and plot ship locations based on time since last update"""
+        """Plot freshest available ship locations"""
         # Raise error if figure,  map,  or filename do not exist
         if self._figure == None or self._map == None:
             raise Exception('Map not yet generated!')
         if shipFile == None:
             raise Exception('Ship location filename not specified.')
-        # Get last update time
-        lastUpdate = os.path.getmtime(shipFile)
-        # If more than 5 minutes old, try to update
-        if lastUpdate < time.time() - 300:
-            os.system(self._ship_script)
-        # Update last update time
+        # Get last update time (fetching is handled by the refresh scheduler)
         lastUpdate = os.path.getmtime(shipFile)
         # Load ship data
-        with open(shipFile) as f:
-            ships = json.load(f)
+        ships = self.prepare_ships(shipFile)
         # Point format
         pointfmt = {
             "s": 75,
@@ -467,8 +910,9 @@ class Plot(object):
             "color": "#adcefa"
         }
         # Plot points to map
-        for ship in ships['objects']:
-            self.plot_point(lon=ship['vessel']['longitude'], lat=ship['vessel']['latitude'], **pointfmt)
+        lons = [ship['vessel']['longitude'] for ship in ships['objects']]
+        lats = [ship['vessel']['latitude'] for ship in ships['objects']]
+        self.plot_points(lons=lons, lats=lats, layer='ships', **pointfmt)
         # Plot update time
         updateTextFmt = {
                 'color': '#a60000',
@@ -482,7 +926,7 @@ class Plot(object):
             }
         updateTextFmt.update(kwargs)
         updateText = 'Ship Locations Updated:  {}'.format(time.strftime('%B %d, %Y  %I:%M%p', time.localtime(lastUpdate)))
-        self.add_text_to_fig(x=txtX, y=txtY, text=updateText, **updateTextFmt)
+        self.add_label_to_fig(updateText, txtX, txtY, 'ships:updated', keep=False, **updateTextFmt)
 
     def save_map(self):
         """Save map to file"""
@@ -500,9 +944,14 @@ class Plot(object):
         #plt.close()
 
     def create_map(self):
-        """Create figure and initialize map"""
+        """Create figure and initialize map (kept for later frames once created)"""
+        # Reuse existing figure structure; layers update their retained artists in place
+        if self._figure is not None:
+            return
         # Create figure
         self._figure = plt.figure(figsize=self._plot_size, linewidth=0.0, dpi=self._dpi)
+        # Agg canvas reused for every frame
+        self._canvas = FigureCanvasAgg(self._figure)
         # Create map object and clear surrounding whitespace
         self._map = self._figure.add_axes([0, 0, 1, 1], frameon=False, projection=ccrs.PlateCarree())
         # Set global zoom level
@@ -511,29 +960,61 @@ class Plot(object):
         self._map.background_patch.set_visible(False)
         self._map.outline_patch.set_visible(False)
 
+    def _decode_image(self, imageFile, replaceColor=None):
+        """Decode image file, making replaceColor transparent if specified"""
+        # If transparency color not specified
+        if replaceColor == None:
+            # Read specified image
+            return plt.imread(imageFile)
+        # Open image and get data
+        img = Image.open(imageFile)
+        img = img.convert("RGBA")
+        idata = img.getdata()
+        # Update colors
+        newColor = (replaceColor[0], replaceColor[1], replaceColor[2], 0)
+        newData = [newColor if original[0] == replaceColor[0] and original[1] == replaceColor[1] and original[2] == replaceColor[2] else original for original in idata]
+        # Update image data
+        img.putdata(newData)
+        return img
+
+    def _image_size(self, extent=None):
+        """Output size in pixels (width, height) of an image covering extent"""
+        extent = extent or self._extent
+        width = self._plot_size[0]*self._dpi
+        height = self._plot_size[1]*self._dpi
+        return (int(round(width*(extent[1]-extent[0])/self._lon_range)), int(round(height*(extent[3]-extent[2])/self._lat_range)))
+
+    def prepare_image(self, imageFile=None, replaceColor=None, extent=None, **kwargs):
+        """Decode image, cached until the file changes (no drawing)"""
+        if imageFile == None:
+            raise Exception('Image filename not specified.')
+        # Plain images come memory-mapped from the asset store, resampled to output size
+        if replaceColor == None:
+            return self._cached_file(imageFile, lambda path: self.assets.load(path, self._image_size(extent)))
+        return self._cached_file(imageFile, lambda path: self._decode_image(path, replaceColor))
+
     def load_image(self, imageFile=None, replaceColor=None, *args, **kwargs):
         """Load an image and add to map"""
         # Raise error if figure,  map,  or filename do not exist
         if self._figure == None or self._map == None:
             raise Exception('Map not yet generated!')
-        if imageFile == None:
-            raise Exception('Image filename not specified.')
-        # If transparency color not specified
-        if replaceColor == None:
-            # Read specified image and add to map
-            self._map.imshow(plt.imread(imageFile), transform=ccrs.PlateCarree(), *args, **kwargs)
-        else:
-            # Open image and get data
-            img = Image.open(imageFile)
-            img = img.convert("RGBA")
-            idata = img.getdata()
-            # Update colors
-            newColor = (replaceColor[0], replaceColor[1], replaceColor[2], 0)
-            newData = [newColor if original[0] == replaceColor[0] and original[1] == replaceColor[1] and original[2] == replaceColorTransparent[2] else original for original in idata]
-            # Update image data
-            img.putdata(newData)
-            # Add image to map
-            self._map.imshow(img, transform=ccrs.PlateCarree(), *args, **kwargs)
+        # Read specified image
+        img = self.prepare_image(imageFile, replaceColor, kwargs.get('extent'))
+        # Add image to map, replacing the data of the image drawn on previous frames
+        self._retained('image:' + imageFile,
+                       lambda: self._map.imshow(img, transform=ccrs.PlateCarree(), *args, **kwargs),
+                       lambda im: im.set_data(img))
+
+    def start_service(self):
+        """Start the local wallpaper service if configured; returns the server or None"""
+        if self.frames is None:
+            return None
+        try:
+            return serve.start(self.frames, self._serve_cfg.get('port', 8766), self._serve_cfg.get('host', '127.0.0.1'))
+        except (IOError, OSError) as e:
+            # Port already taken, e.g. by serve.py run from geis-serve.plist
+            logging.warning('Wallpaper service not started: {}'.format(e))
+            return None
 
     def set_wallpaper(self):
         """Save map as bmp format and set it as the wallpaper"""
@@ -545,12 +1026,10 @@ class Plot(object):
             # Raise error if figure or filename do not exist
             if self._figure == None:
                 raise Exception('Map not yet generated!')
-            # Convert image
-            canvas = plt.get_current_fig_manager().canvas
-            agg = canvas.switch_backends(FigureCanvasAgg)
-            agg.draw()
-            crop_img = Image.fromstring('RGB', self._figure.canvas.get_width_height(), agg.tostring_rgb())
-            #plt.close()
+            # Redraw the retained figure on its Agg canvas and wrap the buffer without copying
+            with metrics.timer('geis_frame_seconds', stage='draw'):
+                self._canvas.draw()
+            crop_img = Image.frombuffer('RGBA', self._canvas.get_width_height(), self._canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
         # Determine crop coordinates
         w, h = crop_img.size
         wDiff = int((w-self._screen_size[0])*0.5)
@@ -558,10 +1037,37 @@ class Plot(object):
         cropBox = (wDiff, hDiff, self._screen_size[0]+wDiff, self._screen_size[1]+hDiff)
         # Crop image
         crop_img = crop_img.crop(cropBox)
-        # Try to save temporary file,  otherwise convert to correct image format and save again
-        try:
-            crop_img.save(self.save_file, 'PNG')
-        except:
-            crop_img = crop_img.convert('RGB')
-            crop_img.save(self.save_file, 'PNG')
+        # Encode image,  converting to correct image format if needed
+        with metrics.timer('geis_frame_seconds', stage='encode'):
+            buf = io.BytesIO()
+            try:
+                crop_img.save(buf, 'PNG')
+            except:
+                crop_img = crop_img.convert('RGB')
+                buf = io.BytesIO()
+                crop_img.save(buf, 'PNG')
+            png = buf.getvalue()
+        # Write to temporary file and rename so readers never see a partial frame
+        tmp = self.save_file + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(png)
+        os.rename(tmp, self.save_file)
+        # Publish frame to the wallpaper service
+        if self.frames is not None:
+            self.frames.publish(crop_img, png=png)
+        # Add frame to archive
+        if self.archive is not None:
+            self.archive.add(crop_img, ts=self._render_ts())
+        metrics.inc('geis_frames_total')
+        metrics.gauge('geis_last_frame_timestamp_seconds', time.time())
+        self.export_metrics()
+
+    def export_metrics(self):
+        """Update data age gauges and write the metrics file if configured"""
+        now = time.time()
+        for name, source in self.scheduler.sources.items():
+            if os.path.exists(source.target):
+                metrics.gauge('geis_data_age_seconds', now - os.path.getmtime(source.target), source=name)
+        if self._metrics_file is not None:
+            metrics.REGISTRY.write(self._metrics_file)
 